@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
 from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import timedelta
-import yfinance as yf
-from typing import List
+import pandas as pd
+from typing import List, Optional
 
 # --- Local Imports ---
-from ... import schemas, crud, security, models
-from ...database import get_db
-from ...core import forecasting, suggestion_engine, market_data, sentiment_analysis
+from ... import schemas, crud, security, models, http_cache
+from ...database import get_db, SessionLocal
+from ...core import forecasting, suggestion_engine, market_data, sentiment_analysis, reports_export, intraday
+from ...core.lstm_batcher import lstm_batcher
+from ...core.market_client import market_client
+from ...core.features import feature_cache
 
 router = APIRouter()
 
@@ -37,7 +41,7 @@ def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2Passw
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/auth/forgot-password", tags=["Authentication"])
-async def forgot_password(email_schema: schemas.EmailSchema, db: Session = Depends(get_db)):
+def forgot_password(email_schema: schemas.EmailSchema, db: Session = Depends(get_db)):
     user = crud.get_user_by_email(db, email=email_schema.email)
     if not user:
         return {"message": "If an account with that email exists, a password reset link has been sent."}
@@ -45,7 +49,7 @@ async def forgot_password(email_schema: schemas.EmailSchema, db: Session = Depen
     reset_token = security.create_access_token(
         data={"sub": user.email}, expires_delta=timedelta(minutes=15)
     )
-    await security.send_password_reset_email(email=user.email, token=reset_token)
+    security.send_password_reset_email(email=user.email, token=reset_token)
     return {"message": "Password reset email sent."}
 
 @router.post("/auth/reset-password", tags=["Authentication"])
@@ -85,47 +89,135 @@ def remove_from_watchlist(ticker: str, db: Session = Depends(get_db), current_us
 # === STOCKS, REPORTS & SENTIMENT ENDPOINTS ===
 
 @router.get("/stocks/forecast/{ticker}", response_model=schemas.ForecastResponse, tags=["Stocks"])
-def get_forecast(ticker: str, horizon: int = 5, current_user: models.User = Depends(security.get_current_user)):
-    result = forecasting.run_all_forecasts(ticker, horizon)
-    if "error" in result:
-        raise HTTPException(status_code=404, detail=result["error"])
-    return result
+def get_forecast(request: Request, ticker: str, horizon: int = 5, horizons: Optional[List[int]] = Query(None), budget_seconds: Optional[float] = Query(None, gt=0), current_user: models.User = Depends(security.get_current_user)):
+    # e.g. ?horizons=1&horizons=5&horizons=20 answers all three from one fit per model
+    if horizons and min(horizons) < 1:
+        raise HTTPException(status_code=400, detail="Horizons must be positive.")
+    series = forecasting.download_price_history(ticker)
+    if series is None or series.empty:
+        raise HTTPException(status_code=404, detail=f"No data found for ticker {ticker}")
+
+    def build_forecast():
+        result = forecasting.run_all_forecasts(ticker, horizon, budget_seconds, series=series, horizons=horizons)
+        if "error" in result:
+            raise HTTPException(status_code=404, detail=result["error"])
+        return schemas.ForecastResponse(**result).dict()
+
+    # A client holding the forecast for the same bars and models gets a 304 without any fitting
+    return http_cache.cached_json_response(
+        request, build_forecast, max_age=http_cache.FORECAST_MAX_AGE,
+        data_version=forecasting.forecast_data_version(ticker, series, horizon, horizons, budget_seconds)
+    )
 
 @router.get("/stocks/suggest", response_model=List[schemas.Suggestion], tags=["Stocks"])
-def get_suggestions(db: Session = Depends(get_db), horizon: int = 5, current_user: models.User = Depends(security.get_current_user)):
+def get_suggestions(request: Request, db: Session = Depends(get_db), horizon: int = 5, current_user: models.User = Depends(security.get_current_user)):
     suggestions = suggestion_engine.generate_suggestions(db=db, horizon=horizon)
     if not suggestions:
         raise HTTPException(status_code=500, detail="Could not generate suggestions.")
-    return suggestions
+    generated_at = suggestion_engine.suggestions_cache["timestamp"]
+    return http_cache.cached_json_response(
+        request, lambda: [schemas.Suggestion(**s).dict() for s in suggestions],
+        max_age=http_cache.SUGGESTIONS_MAX_AGE, last_modified=generated_at, data_version=("suggest", generated_at)
+    )
 
 @router.get("/stocks/market-overview", response_model=schemas.MarketOverviewResponse, tags=["Stocks"])
-def get_market_overview_endpoint(current_user: models.User = Depends(security.get_current_user)):
-    return market_data.get_market_overview()
+def get_market_overview_endpoint(request: Request, current_user: models.User = Depends(security.get_current_user)):
+    overview, fetched_at = market_data.get_market_overview()
+    return http_cache.cached_json_response(
+        request, lambda: schemas.MarketOverviewResponse(**overview).dict(),
+        max_age=http_cache.MARKET_OVERVIEW_MAX_AGE, last_modified=fetched_at, data_version=("market-overview", fetched_at)
+    )
 
 @router.get("/stocks/reports", response_model=schemas.ReportsResponse, tags=["Stocks"])
-def get_reports(db: Session = Depends(get_db), current_user: models.User = Depends(security.get_current_user)):
-    history = crud.get_suggestion_history(db)
-    tickers = [item.ticker for item in history]
+def get_reports(request: Request, db: Session = Depends(get_db), current_user: models.User = Depends(security.get_current_user)):
+    tickers = crud.get_suggestion_history_tickers(db)
     if not tickers:
-        return {"history": []}
-        
-    current_prices_data = yf.download(tickers, period="1d", progress=False)['Close']
-    
-    report_items = []
-    for item in history:
-        current_price = current_prices_data.get(item.ticker)
-        if current_price is not None:
-            performance = ((current_price - item.price_at_suggestion) / item.price_at_suggestion) * 100
-            report_items.append({
-                "date_suggested": item.date_suggested, "ticker": item.ticker,
-                "price_at_suggestion": item.price_at_suggestion,
-                "current_price": current_price, "performance_percent": performance
-            })
-    return {"history": report_items}
+        return http_cache.cached_json_response(request, {"history": []}, max_age=http_cache.REPORTS_MAX_AGE)
+    current_prices = reports_export.get_price_snapshot(tickers)
+
+    def build_report():
+        report_items = []
+        for item in crud.get_suggestion_history(db):
+            current_price = current_prices.get(item.ticker)
+            if current_price is not None and not pd.isna(current_price):
+                performance = ((current_price - item.price_at_suggestion) / item.price_at_suggestion) * 100
+                report_items.append({
+                    "date_suggested": item.date_suggested, "ticker": item.ticker,
+                    "price_at_suggestion": item.price_at_suggestion,
+                    "current_price": current_price, "performance_percent": performance
+                })
+        return schemas.ReportsResponse(history=report_items).dict()
+
+    data_version = ("reports", crud.get_suggestion_history_version(db), tuple(current_prices.items()))
+    return http_cache.cached_json_response(request, build_report, max_age=http_cache.REPORTS_MAX_AGE, data_version=data_version)
+
+@router.get("/stocks/reports/export", tags=["Stocks"])
+def export_reports(format: str = "csv", chunk_size: int = Query(reports_export.EXPORT_CHUNK_SIZE, gt=0, le=reports_export.MAX_EXPORT_CHUNK_SIZE), current_user: models.User = Depends(security.get_current_user)):
+    if format not in reports_export.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    iter_export, media_type = reports_export.EXPORT_FORMATS[format]
+
+    def stream():
+        # The request-scoped session may be closed before streaming finishes
+        db = SessionLocal()
+        try:
+            yield from iter_export(db, chunk_size)
+        finally:
+            db.close()
+
+    return StreamingResponse(stream(), media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="suggestion_history.{format}"'
+    })
 
 @router.get("/stocks/sentiment/{ticker}", response_model=schemas.SentimentResponse, tags=["Stocks"])
-def get_sentiment_for_ticker(ticker: str, current_user: models.User = Depends(security.get_current_user)):
-    sentiment_data = sentiment_analysis.get_news_sentiment(ticker)
+async def get_sentiment_for_ticker(ticker: str, current_user: models.User = Depends(security.get_current_user)):
+    sentiment_data = await sentiment_analysis.get_news_sentiment(ticker)
     if "error" in sentiment_data:
         raise HTTPException(status_code=500, detail=f"Could not process sentiment for {ticker}")
-    return sentiment_data
\ No newline at end of file
+    return sentiment_data
+
+# === INTRADAY STREAMING ENDPOINTS ===
+
+@router.get("/stocks/intraday/{ticker}", tags=["Stocks"])
+def get_intraday_forecast(ticker: str, current_user: models.User = Depends(security.get_current_user)):
+    update = intraday.intraday_hub.latest.get(ticker.upper())
+    if update is None:
+        raise HTTPException(status_code=404, detail=f"No intraday data for {ticker}")
+    return update
+
+@router.websocket("/stocks/intraday/{ticker}/ws")
+async def stream_intraday_forecast(websocket: WebSocket, ticker: str, token: str):
+    # Browsers can't set headers on a WebSocket, so the JWT comes as ?token=
+    db = SessionLocal()
+    try:
+        security.get_current_user(token=token, db=db)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    finally:
+        db.close()
+
+    await websocket.accept()
+    ticker = ticker.upper()
+    subscriber = intraday.intraday_hub.subscribe(ticker)
+    try:
+        while True:
+            await websocket.send_json(await subscriber.get())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        intraday.intraday_hub.unsubscribe(ticker, subscriber)
+
+# === MONITORING ENDPOINTS ===
+
+@router.get("/system/lstm-batching", tags=["Monitoring"])
+def get_lstm_batching_metrics(current_user: models.User = Depends(security.get_current_user)):
+    return lstm_batcher.get_metrics()
+
+@router.get("/system/market-data", tags=["Monitoring"])
+def get_market_data_status(current_user: models.User = Depends(security.get_current_user)):
+    return market_client.get_status()
+
+@router.get("/system/feature-cache", tags=["Monitoring"])
+def get_feature_cache_status(current_user: models.User = Depends(security.get_current_user)):
+    return feature_cache.get_status()
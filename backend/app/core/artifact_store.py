@@ -0,0 +1,174 @@
+import os
+import io
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+from tensorflow.keras.models import model_from_json
+
+# --- Indexed, Content-Addressed Model Artifact Store ---
+# Layout under ARTIFACT_STORE_PATH:
+#   manifest.db                  SQLite index: one row per (ticker, model_type, version)
+#   objects/ab/abcdef...         immutable blobs named by their SHA-256
+# A manifest row maps part names (e.g. "model", "scaler", "weight_000") to
+# object hashes, so identical blobs are stored once and a published version
+# never changes. Numeric arrays are stored as .npy and memory-mapped on load,
+# so reading them needs no file parse or intermediate buffer. Keras still
+# copies the weights into its own variables when a model is built.
+# The latest row per (ticker, model_type) is cached in memory. When another
+# process has written to the manifest the cache is dropped, and each key is
+# looked up again on its next use with a primary-key query.
+
+ARTIFACT_STORE_PATH = os.getenv("ARTIFACT_STORE_PATH", "artifacts")
+
+class ArtifactStore:
+    def __init__(self, root: str = ARTIFACT_STORE_PATH):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self._conn = None
+        self._lock = threading.Lock()
+        self._latest = {}
+        self._data_version = None
+
+    # --- Manifest ---
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(self.objects_dir, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.root, "manifest.db"), timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    ticker TEXT NOT NULL,
+                    model_type TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    train_start TEXT,
+                    train_end TEXT,
+                    checksum TEXT NOT NULL,
+                    parts TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (ticker, model_type, version)
+                )
+            """)
+            self._conn = conn
+        return self._conn
+
+    def _check_data_version(self):
+        data_version = self._connection().execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._latest = {}
+            self._data_version = data_version
+
+    def latest(self, ticker: str, model_type: str):
+        """The newest manifest entry for a ticker's model, or None."""
+        key = (ticker, model_type)
+        with self._lock:
+            self._check_data_version()
+            if key not in self._latest:
+                row = self._connection().execute("""
+                    SELECT ticker, model_type, version, train_start, train_end, checksum, parts FROM artifacts
+                    WHERE ticker = ? AND model_type = ? ORDER BY version DESC LIMIT 1
+                """, key).fetchone()
+                self._latest[key] = None if row is None else _entry(row)
+            return self._latest[key]
+
+    def get(self, ticker: str, model_type: str, version: int):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT ticker, model_type, version, train_start, train_end, checksum, parts FROM artifacts WHERE ticker = ? AND model_type = ? AND version = ?",
+                (ticker, model_type, version)
+            ).fetchone()
+        return None if row is None else _entry(row)
+
+    def publish(self, ticker: str, model_type: str, parts: dict, train_start=None, train_end=None):
+        """Records a new version pointing at already-stored objects. Returns the manifest entry."""
+        checksum = _parts_checksum(parts)
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = conn.execute(
+                    "SELECT COALESCE(MAX(version), 0) + 1 FROM artifacts WHERE ticker = ? AND model_type = ?", (ticker, model_type)
+                ).fetchone()[0]
+                conn.execute(
+                    "INSERT INTO artifacts (ticker, model_type, version, train_start, train_end, checksum, parts, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (ticker, model_type, version, _as_text(train_start), _as_text(train_end), checksum, json.dumps(parts, sort_keys=True), time.time())
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            # data_version only tracks other connections' writes
+            self._latest.pop((ticker, model_type), None)
+        return self.get(ticker, model_type, version)
+
+    # --- Objects ---
+
+    def _object_path(self, digest: str):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def put_bytes(self, data: bytes):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def put_array(self, array):
+        buffer = io.BytesIO()
+        np.save(buffer, np.ascontiguousarray(array), allow_pickle=False)
+        return self.put_bytes(buffer.getvalue())
+
+    def read_bytes(self, digest: str):
+        with open(self._object_path(digest), "rb") as f:
+            data = f.read()
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Artifact object {digest} is corrupt.")
+        return data
+
+    def load_array(self, digest: str):
+        """Memory-maps a stored array read-only; pages are read lazily and shared between processes."""
+        return np.load(self._object_path(digest), mmap_mode="r", allow_pickle=False)
+
+    # --- Keras models: architecture JSON + one .npy object per weight array ---
+
+    def put_keras_model(self, model):
+        parts = {"architecture": self.put_bytes(model.to_json().encode())}
+        for i, weights in enumerate(model.get_weights()):
+            parts[f"weight_{i:03d}"] = self.put_array(weights)
+        return parts
+
+    def load_keras_model(self, parts: dict):
+        """
+        Rebuilds the model from its architecture and mmap-backed weights.
+        set_weights copies each array into a TF variable, so the mapping
+        only saves the read-then-copy of deserializing an .h5 file; the
+        loaded model owns its weights in memory.
+        """
+        model = model_from_json(self.read_bytes(parts["architecture"]).decode())
+        weight_names = sorted(name for name in parts if name.startswith("weight_"))
+        model.set_weights([self.load_array(parts[name]) for name in weight_names])
+        return model
+
+def _as_text(value):
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+def _parts_checksum(parts: dict):
+    return hashlib.sha256("\n".join(f"{name}:{digest}" for name, digest in sorted(parts.items())).encode()).hexdigest()
+
+def _entry(row):
+    return {
+        "ticker": row[0], "model_type": row[1], "version": row[2],
+        "train_start": row[3], "train_end": row[4], "checksum": row[5], "parts": json.loads(row[6]),
+    }
+
+# Shared instance used by training and inference
+artifact_store = ArtifactStore()
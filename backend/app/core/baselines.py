@@ -0,0 +1,82 @@
+import numpy as np
+
+# --- Vectorized Baseline Forecasters ---
+# Every function takes a (tickers x time) price matrix and returns a
+# (tickers x horizon) forecast matrix, computed for all tickers at once.
+
+def fill_price_matrix(prices):
+    """
+    Forward-fills gaps along time so tickers with missing bars (holidays,
+    late listings) still have a usable last price. Leading NaNs are
+    back-filled from the first valid price.
+    """
+    prices = np.asarray(prices, dtype=float)
+    mask = np.isnan(prices)
+    idx = np.where(~mask, np.arange(prices.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = prices[np.arange(prices.shape[0])[:, None], idx]
+    first_valid = np.argmax(~np.isnan(filled), axis=1)
+    leading = np.arange(prices.shape[1]) < first_valid[:, None]
+    filled[leading] = np.broadcast_to(filled[np.arange(prices.shape[0]), first_valid][:, None], filled.shape)[leading]
+    return filled
+
+def naive_forecast(prices, horizon: int):
+    return np.repeat(prices[:, -1:], horizon, axis=1)
+
+def drift_forecast(prices, horizon: int):
+    slope = (prices[:, -1] - prices[:, 0]) / max(prices.shape[1] - 1, 1)
+    steps = np.arange(1, horizon + 1)
+    return prices[:, -1:] + slope[:, None] * steps
+
+def ema_forecast(prices, horizon: int, span: int = 20):
+    alpha = 2.0 / (span + 1)
+    level = prices[:, 0].copy()
+    for t in range(1, prices.shape[1]):
+        level += alpha * (prices[:, t] - level)
+    return np.repeat(level[:, None], horizon, axis=1)
+
+def holt_linear_forecast(prices, horizon: int, alpha: float = 0.3, beta: float = 0.1):
+    level = prices[:, 0].copy()
+    trend = prices[:, 1] - prices[:, 0] if prices.shape[1] > 1 else np.zeros_like(level)
+    for t in range(1, prices.shape[1]):
+        previous_level = level
+        level = alpha * prices[:, t] + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+    steps = np.arange(1, horizon + 1)
+    return level[:, None] + trend[:, None] * steps
+
+BASELINE_MODELS = {
+    'naive': naive_forecast,
+    'drift': drift_forecast,
+    'ema': ema_forecast,
+    'holt': holt_linear_forecast,
+}
+
+def run_all_baselines(prices, horizon: int):
+    """Returns {model_name: (tickers x horizon) forecast matrix}."""
+    prices = fill_price_matrix(prices)
+    return {name: model(prices, horizon) for name, model in BASELINE_MODELS.items()}
+
+def screen_universe(tickers, prices, horizon: int, top_k: int):
+    """
+    Cheap first stage of the suggestion pipeline: scores every ticker by the
+    mean predicted growth of the baseline models and returns the top_k
+    tickers (best first) along with their latest prices.
+    """
+    prices = fill_price_matrix(prices)
+    valid = ~np.isnan(prices[:, -1])
+    forecasts = run_all_baselines(prices, horizon)
+    last_price = prices[:, -1]
+    ensemble_pred = np.mean([f[:, -1] for f in forecasts.values()], axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        growth = np.where(valid, (ensemble_pred - last_price) / last_price * 100, -np.inf)
+
+    top_k = min(top_k, int(valid.sum()))
+    if top_k <= 0:
+        return []
+    top_idx = np.argpartition(-growth, top_k - 1)[:top_k]
+    top_idx = top_idx[np.argsort(-growth[top_idx])]
+    return [
+        {"ticker": tickers[i], "current_price": float(last_price[i]), "baseline_growth_percent": float(growth[i])}
+        for i in top_idx
+    ]
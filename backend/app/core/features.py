@@ -0,0 +1,113 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+# --- Shared Per-Ticker Feature Preparation ---
+# ARIMA/SARIMA, Prophet and the LSTM all derive their inputs from the same
+# close-price series. SeriesFeatures computes each derived view once, on
+# first use, and the FeatureCache keeps it per (ticker, latest bars) so
+# every model and every request for that ticker reuses it until a new bar
+# arrives or the latest ones change (yfinance keeps updating the current
+# day's close while the market is open). Everything handed out is shared:
+# callers must not mutate it.
+
+LOOK_BACK = 60
+KEY_TAIL_BARS = 5   # Latest closes that are part of the cache key
+FEATURE_CACHE_MAX_ENTRIES = int(os.getenv("FEATURE_CACHE_MAX_ENTRIES", "256"))
+
+class SeriesFeatures:
+    def __init__(self, series):
+        self.series = series
+        self._lock = threading.Lock()
+        self._splits = {}
+        self._prophet_frame = None
+        self._lstm = None
+        self._last_windows = {}
+
+    @property
+    def current_price(self):
+        return self.series.iloc[-1]
+
+    def split(self, horizon: int):
+        """(train, test): everything but the last `horizon` bars, and those bars."""
+        with self._lock:
+            if horizon not in self._splits:
+                self._splits[horizon] = (self.series[:-horizon], self.series[-horizon:])
+            return self._splits[horizon]
+
+    @property
+    def prophet_frame(self):
+        """The series as Prophet's ds/y frame."""
+        with self._lock:
+            if self._prophet_frame is None:
+                df = self.series.reset_index(); df.columns = ['ds', 'y']
+                self._prophet_frame = df
+            return self._prophet_frame
+
+    def _lstm_features(self):
+        with self._lock:
+            if self._lstm is None:
+                scaler = MinMaxScaler(feature_range=(0, 1))
+                scaled = scaler.fit_transform(self.series.values.reshape(-1, 1))[:, 0]
+                # Window i is scaled[i:i + LOOK_BACK] and its target is the bar right after it
+                windows = np.lib.stride_tricks.sliding_window_view(scaled, LOOK_BACK)[:-1]
+                self._lstm = (scaler, windows[..., np.newaxis], scaled[LOOK_BACK:])
+            return self._lstm
+
+    @property
+    def lstm_scaler(self):
+        return self._lstm_features()[0]
+
+    def lstm_windows(self):
+        """(X, y) for the LSTM: X is (samples, LOOK_BACK, 1) over the min-max scaled series."""
+        _, X, y = self._lstm_features()
+        return X, y
+
+    def last_window(self, scaler):
+        """The last LOOK_BACK bars scaled with a given (pre-trained) scaler, shaped (1, LOOK_BACK, 1)."""
+        key = id(scaler)
+        with self._lock:
+            if key not in self._last_windows:
+                window = scaler.transform(self.series[-LOOK_BACK:].values.reshape(-1, 1))
+                # Keep the scaler referenced so its id can't be reused while cached
+                self._last_windows[key] = (scaler, np.array([window]))
+            return self._last_windows[key][1]
+
+class FeatureCache:
+    """LRU of SeriesFeatures keyed by (ticker, last bar date, number of bars, latest closes)."""
+    def __init__(self, max_entries: int = FEATURE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, ticker: str, series):
+        # The bar count is part of the key because the same ticker is fetched
+        # over different periods (3y for real-time training, 90d for inference).
+        # The latest closes catch the current bar being updated intraday.
+        key = (ticker, series.index[-1], len(series), np.ascontiguousarray(series.values[-KEY_TAIL_BARS:], dtype=float).tobytes())
+        with self._lock:
+            features = self._entries.get(key)
+            if features is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return features
+            self.misses += 1
+
+        # Own copy: the caller's series may be a view of shared memory
+        features = SeriesFeatures(series.copy())
+        with self._lock:
+            features = self._entries.setdefault(key, features)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return features
+
+    def get_status(self):
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+# Shared instance used by the real-time and pre-trained forecasting paths
+feature_cache = FeatureCache()
@@ -1,126 +1,196 @@
 import os
+import threading
+from collections import OrderedDict
 import pandas as pd
-import yfinance as yf
 import pickle
 import joblib
 from prophet.serialize import model_from_json
 from tensorflow.keras.models import load_model
-import numpy as np
 
 # --- Import the real-time training functions ---
-from .realtime_forecasting import run_all_forecasts_realtime
+from .realtime_forecasting import run_all_forecasts_realtime, add_horizon_results
+from .lstm_batcher import lstm_batcher
+from .market_client import market_client
+from .features import feature_cache
+from .artifact_store import artifact_store
+from . import model_selection
 
-def predict_from_saved_models(ticker: str, horizon: int = 5):
-    """
-    Attempts to load pre-trained models and make a forecast.
-    Returns None if files are not found.
-    """
-    model_path = f"{ticker}_arima.pkl"
-    if not os.path.exists(model_path):
-        print(f"--- No pre-trained model found for {ticker}. Switching to real-time training. ---")
-        return None # Signal that we need to train in real-time
+# Overall latency budget for the real-time ensemble (seconds)
+DEFAULT_BUDGET_SECONDS = float(os.getenv("FORECAST_BUDGET_SECONDS", "60"))
 
-    print(f"--- Loading pre-trained models for {ticker} ---")
-    results = {}
-    try:
-        # Load and predict with ARIMA
-        with open(f"{ticker}_arima.pkl", "rb") as f:
-            arima_model = pickle.load(f)
-        arima_pred = arima_model.forecast(steps=horizon)
-        results['arima'] = {"status": "success", "last_pred": arima_pred.iloc[-1]}
+# Loaded pre-trained models per ticker, tagged with the artifact versions
+# they came from. Kept so concurrent requests for a ticker share one LSTM
+# instance (and so one micro-batch); publishing a new version replaces them.
+# LRU-bounded so memory doesn't grow with the size of the universe.
+SAVED_MODELS_CACHE_MAX_ENTRIES = int(os.getenv("SAVED_MODELS_CACHE_MAX_ENTRIES", "64"))
+saved_models_cache = OrderedDict()
+_saved_models_lock = threading.Lock()
 
-        # Load and predict with Prophet
-        with open(f"{ticker}_prophet.json", "r") as f:
-            prophet_model = model_from_json(f.read())
-        future = prophet_model.make_future_dataframe(periods=horizon)
-        forecast = prophet_model.predict(future)
-        results['prophet'] = {"status": "success", "last_pred": forecast['yhat'].iloc[-1]}
-
-        # Load and predict with LSTM
-        lstm_model = load_model(f"{ticker}_lstm.h5")
-        scaler = joblib.load(f"{ticker}_scaler.save")
-        data = yf.download(ticker, period="90d", interval="1d", progress=False)
-        series = data['Close']
-        last_60_days = series[-60:].values.reshape(-1, 1)
-        last_60_days_scaled = scaler.transform(last_60_days)
-        X_test = np.array([last_60_days_scaled])
-        pred_scaled = lstm_model.predict(X_test, verbose=0)
-        pred = scaler.inverse_transform(pred_scaled)
-        results['lstm'] = {"status": "success", "last_pred": pred[0][0]}
+SAVED_MODEL_TYPES = ('arima', 'prophet', 'lstm')
+PRICE_HISTORY_PERIOD = "3y"   # Enough for real-time training; the saved models use the tail
 
-        return {
-            "ticker": ticker, "horizon": horizon, "results": results,
-            "best_model": "lstm" # Default for pre-trained
-        }
-    except Exception as e:
-        print(f"Error loading pre-trained models for {ticker}: {e}")
-        return None # Fallback to real-time if there's an error
+def _load_from_store(ticker: str, entries):
+    arima_entry, prophet_entry, lstm_entry = entries
+    return (
+        pickle.loads(artifact_store.read_bytes(arima_entry["parts"]["model"])),
+        model_from_json(artifact_store.read_bytes(prophet_entry["parts"]["model"]).decode()),
+        artifact_store.load_keras_model(lstm_entry["parts"]),
+        pickle.loads(artifact_store.read_bytes(lstm_entry["parts"]["scaler"])),
+    )
+
+def _load_legacy_files(ticker: str, entries):
+    # Loose files in the working directory, written by older versions of train_models.py
+    with open(f"{ticker}_arima.pkl", "rb") as f:
+        arima_model = pickle.load(f)
+    with open(f"{ticker}_prophet.json", "r") as f:
+        prophet_model = model_from_json(f.read())
+    return arima_model, prophet_model, load_model(f"{ticker}_lstm.h5"), joblib.load(f"{ticker}_scaler.save")
 
-def run_all_forecasts(ticker: str, horizon: int):
+def load_saved_models(ticker: str):
     """
-    Main function that first tries to use saved models, then falls back
-    to real-time training if necessary.
+    Returns (arima, prophet, lstm, scaler) for a ticker from the artifact
+    store, falling back to the legacy loose files. None if neither has a
+    full set.
     """
-    # First, try the fast, pre-trained model approach
-    result = predict_from_saved_models(ticker, horizon)
+    entries = [artifact_store.latest(ticker, model_type) for model_type in SAVED_MODEL_TYPES]
+    if all(entries):
+        key, loader = tuple(entry["checksum"] for entry in entries), _load_from_store
+    elif os.path.exists(f"{ticker}_arima.pkl"):
+        key, loader = ("legacy",), _load_legacy_files
+    else:
+        return None
 
-    # If it returns a result, we're done
-    if result:
-        return result
+    with _saved_models_lock:
+        cached = saved_models_cache.get(ticker)
+        if cached is not None and cached[0] == key:
+            saved_models_cache.move_to_end(ticker)
+            return cached[1]
 
-    # Otherwise, run the slower, real-time training
-    return run_all_forecasts_realtime(ticker, horizon)
-def predict_from_saved_models(ticker: str, horizon: int = 5):
+    models = loader(ticker, entries)
+    with _saved_models_lock:
+        saved_models_cache[ticker] = (key, models)
+        saved_models_cache.move_to_end(ticker)
+        while len(saved_models_cache) > SAVED_MODELS_CACHE_MAX_ENTRIES:
+            saved_models_cache.popitem(last=False)
+    return models
+
+def predict_from_saved_models(ticker: str, horizon: int = 5, series=None, horizons=None):
     """
     Attempts to load pre-trained models and make a forecast.
-    Returns None if files are not found.
+    Returns None if no saved models are found.
     """
-    model_path = f"{ticker}_arima.pkl"
-    if not os.path.exists(model_path):
-        print(f"--- No pre-trained model found for {ticker}. Switching to real-time training. ---")
-        return None # Signal that we need to train in real-time
-
-    print(f"--- Loading pre-trained models for {ticker} ---")
     results = {}
     try:
-        # 1. Load and predict with ARIMA
-        with open(f"{ticker}_arima.pkl", "rb") as f:
-            arima_model = pickle.load(f)
+        saved_models = load_saved_models(ticker)
+        if saved_models is None:
+            print(f"--- No pre-trained model found for {ticker}. Switching to real-time training. ---")
+            return None # Signal that we need to train in real-time
+
+        print(f"--- Loading pre-trained models for {ticker} ---")
+        arima_model, prophet_model, lstm_model, scaler = saved_models
+
+        # 1. Predict with ARIMA
         arima_pred = arima_model.forecast(steps=horizon)
-        results['arima'] = {"status": "success", "last_pred": arima_pred.iloc[-1]}
+        results['arima'] = {"status": "success", "last_pred": arima_pred.iloc[-1], "predictions": arima_pred.tolist()}
 
-        # 2. Load and predict with Prophet
-        with open(f"{ticker}_prophet.json", "r") as f:
-            prophet_model = model_from_json(f.read())
+        # 2. Predict with Prophet
         future = prophet_model.make_future_dataframe(periods=horizon)
         forecast = prophet_model.predict(future)
-        results['prophet'] = {"status": "success", "last_pred": forecast['yhat'].iloc[-1]}
+        results['prophet'] = {"status": "success", "last_pred": forecast['yhat'].iloc[-1], "predictions": forecast['yhat'][-horizon:].tolist()}
 
-        # 3. Load and predict with LSTM
-        lstm_model = load_model(f"{ticker}_lstm.h5")
-        scaler = joblib.load(f"{ticker}_scaler.save")
-        
+        # 3. Predict with LSTM
         # Fetch recent data for LSTM input AND to get the current price
-        data = yf.download(ticker, period="90d", interval="1d", progress=False)
-        series = data['Close']
-        current_price = series.iloc[-1] # GET THE CURRENT PRICE
-        
-        look_back = 60
-        last_60_days = series[-look_back:].values.reshape(-1, 1)
-        last_60_days_scaled = scaler.transform(last_60_days)
-        X_test = np.array([last_60_days_scaled])
-        
-        pred_scaled = lstm_model.predict(X_test, verbose=0)
+        if series is None:
+            data = market_client.download(ticker, period="90d", interval="1d")
+            series = data['Close']
+        features = feature_cache.get(ticker, series)
+        current_price = features.current_price # GET THE CURRENT PRICE
+
+        X_test = features.last_window(scaler)
+
+        pred_scaled = lstm_batcher.predict(lstm_model, X_test)
         pred = scaler.inverse_transform(pred_scaled)
         results['lstm'] = {"status": "success", "last_pred": pred[0][0]}
 
-        return {
+        response = {
             "ticker": ticker, 
             "horizon": horizon, 
             "results": results,
             "best_model": "lstm", # Default for pre-trained
             "current_price": current_price # ADDED CURRENT PRICE
         }
+        if horizons:
+            # Saved models have no holdout, so there is no per-horizon RMSE.
+            # The LSTM only predicts one step ahead and has no path to slice,
+            # so no model is named per horizon.
+            response["horizons"] = add_horizon_results(results, horizons, default_best=response["best_model"])
+        return response
     except Exception as e:
         print(f"Error loading pre-trained models for {ticker}: {e}")
-        return None
\ No newline at end of file
+        return None # Fallback to real-time if there's an error
+
+def download_price_history(ticker: str):
+    """Daily closes for a ticker as a Series, or None if upstream has no data."""
+    data = market_client.download(ticker, period=PRICE_HISTORY_PERIOD, interval="1d")
+    if data.empty:
+        return None
+    close_prices = data['Close']
+    if isinstance(close_prices, pd.DataFrame):
+        close_prices = close_prices.iloc[:, 0]
+    return close_prices.dropna()
+
+def forecast_data_version(ticker: str, series, horizon: int, horizons=None, budget_seconds: float = None):
+    """
+    Everything a forecast depends on, known before computing it: the latest
+    bar and close, and the models that will answer (the saved artifacts'
+    checksums, or the champion and budget for real-time fits).
+    """
+    entries = [artifact_store.latest(ticker, model_type) for model_type in SAVED_MODEL_TYPES]
+    if all(entries):
+        models = tuple(entry["checksum"] for entry in entries)
+    elif os.path.exists(f"{ticker}_arima.pkl"):
+        models = ("legacy", os.path.getmtime(f"{ticker}_arima.pkl"))
+    else:
+        models = (model_selection.champion_version(ticker), budget_seconds)
+    horizons = tuple(sorted(set(horizons))) if horizons else None
+    return ("forecast", ticker, horizon, horizons, series.index[-1].isoformat(), float(series.iloc[-1]), models)
+
+def run_all_forecasts(ticker: str, horizon: int, budget_seconds: float = None, series=None, horizons=None):
+    """
+    Main function that first tries to use saved models, then falls back
+    to real-time training if necessary. The real-time path is bounded by
+    budget_seconds (DEFAULT_BUDGET_SECONDS if not given). If series is
+    given it is used instead of downloading the price history.
+    If horizons is given, horizon becomes the longest of them and every
+    horizon is answered from the same fit.
+    """
+    if horizons:
+        horizons = sorted(set(horizons))
+        horizon = horizons[-1]
+
+    # First, try the fast, pre-trained model approach
+    result = predict_from_saved_models(ticker, horizon, series, horizons)
+
+    # If it returns a result, we're done
+    if result:
+        return result
+
+    # Otherwise, run the slower, real-time training
+    if budget_seconds is None:
+        budget_seconds = DEFAULT_BUDGET_SECONDS
+
+    # Only the ticker's champion is fitted on the request path; challengers
+    # are re-evaluated in the background on a sample of requests
+    models, evaluate_in_background = model_selection.plan_models(ticker)
+    result = run_all_forecasts_realtime(ticker, horizon, budget_seconds, series, models, horizons)
+    if "error" in result:
+        return result
+
+    if models is None:
+        # A budgeted first run may have dropped models; if so, crown the
+        # champion from a complete evaluation in the background instead
+        evaluate_in_background = model_selection.record_evaluation(ticker, result["results"]) is None
+    if evaluate_in_background or result["best_model"] is None:
+        history = None if series is None else series.copy()  # The caller's series may be shared memory
+        model_selection.schedule_evaluation(ticker, lambda: run_all_forecasts_realtime(ticker, horizon, series=history))
+    return result
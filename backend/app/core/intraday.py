@@ -0,0 +1,217 @@
+import os
+import csv
+import math
+import asyncio
+from datetime import datetime
+
+# --- Intraday Streaming Forecasts ---
+# Price ticks/bars come from a pluggable source and update a per-ticker
+# local linear trend model (a 2-state Kalman filter) in constant time.
+# Every update is pushed to the clients subscribed to that ticker; nothing
+# is ever refit.
+
+# "replay:/path/to/ticks.csv" or "socket:host:port"; unset = intraday mode off
+INTRADAY_SOURCE = os.getenv("INTRADAY_SOURCE")
+INTRADAY_HORIZON_BARS = int(os.getenv("INTRADAY_HORIZON_BARS", "12"))
+INTRADAY_REPLAY_DELAY_SECONDS = float(os.getenv("INTRADAY_REPLAY_DELAY_SECONDS", "0"))
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Noise variances relative to the squared price level, so one set of
+# defaults works for a $5 stock and a $500 one
+OBSERVATION_NOISE = 1e-6
+LEVEL_NOISE = 1e-7
+SLOPE_NOISE = 1e-10
+
+def _parse_tick(fields):
+    """fields: [timestamp, ticker, price] with an ISO-8601 or epoch-seconds timestamp."""
+    timestamp, ticker, price = fields[0].strip(), fields[1].strip().upper(), float(fields[2])
+    # A NaN, infinite, zero or negative price would poison the ticker's filter for good
+    if not ticker or not math.isfinite(price) or price <= 0:
+        raise ValueError(f"Invalid tick: {fields}")
+    try:
+        parsed = datetime.fromtimestamp(float(timestamp))
+    except (OverflowError, OSError):
+        raise ValueError(f"Invalid tick timestamp: {timestamp}")
+    except ValueError:
+        parsed = datetime.fromisoformat(timestamp)
+    return ticker, parsed, price
+
+# --- Sources ---
+
+class ReplayFileSource:
+    """Replays a CSV of timestamp,ticker,price rows (a header row is skipped)."""
+    def __init__(self, path: str, delay_seconds: float = INTRADAY_REPLAY_DELAY_SECONDS):
+        self.path = path
+        self.delay_seconds = delay_seconds
+
+    async def ticks(self):
+        with open(self.path, newline="") as f:
+            for row in csv.reader(f):
+                if len(row) < 3:
+                    continue
+                try:
+                    tick = _parse_tick(row)
+                except ValueError:
+                    continue  # Header or malformed row
+                yield tick
+                await asyncio.sleep(self.delay_seconds)
+
+class SocketSource:
+    """Reads newline-delimited timestamp,ticker,price lines from a TCP socket."""
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+
+    async def ticks(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                fields = line.decode().strip().split(",")
+                if len(fields) < 3:
+                    continue
+                try:
+                    yield _parse_tick(fields)
+                except ValueError:
+                    continue
+        finally:
+            writer.close()
+
+def source_from_config(config: str):
+    kind, _, target = config.partition(":")
+    if kind == "replay":
+        return ReplayFileSource(target)
+    if kind == "socket":
+        host, _, port = target.rpartition(":")
+        return SocketSource(host, int(port))
+    raise ValueError(f"Unknown intraday source: {config}")
+
+# --- Online State-Space Model ---
+
+class LocalLinearTrendFilter:
+    """
+    Kalman filter for price = level + noise, level += slope each bar.
+    State is (level, slope) with a 2x2 covariance, so each update is O(1).
+    """
+    def __init__(self, first_price: float):
+        scale = first_price ** 2
+        self.r = OBSERVATION_NOISE * scale
+        self.q_level = LEVEL_NOISE * scale
+        self.q_slope = SLOPE_NOISE * scale
+        self.level, self.slope = first_price, 0.0
+        # Covariance [[p00, p01], [p01, p11]]
+        self.p00, self.p01, self.p11 = self.r, 0.0, self.r
+        self.observations = 1
+
+    def update(self, price: float):
+        # Predict: x = F x, P = F P F' + Q with F = [[1, 1], [0, 1]]
+        level = self.level + self.slope
+        p00 = self.p00 + 2 * self.p01 + self.p11 + self.q_level
+        p01 = self.p01 + self.p11
+        p11 = self.p11 + self.q_slope
+
+        # Update with observation matrix H = [1, 0]
+        innovation = price - level
+        s = p00 + self.r
+        k0, k1 = p00 / s, p01 / s
+        self.level = level + k0 * innovation
+        self.slope = self.slope + k1 * innovation
+        self.p00 = (1 - k0) * p00
+        self.p01 = (1 - k0) * p01
+        self.p11 = p11 - k1 * p01
+        self.observations += 1
+
+    def forecast(self, steps: int):
+        predictions, intervals = [], []
+        for k in range(1, steps + 1):
+            mean = self.level + k * self.slope
+            variance = self.p00 + 2 * k * self.p01 + k * k * self.p11 + k * self.q_level + self.r
+            predictions.append(mean)
+            intervals.append(1.96 * variance ** 0.5)
+        return predictions, intervals
+
+# --- Hub: filters + subscribers ---
+
+class IntradayHub:
+    def __init__(self, horizon_bars: int = INTRADAY_HORIZON_BARS):
+        self.horizon_bars = horizon_bars
+        self.filters = {}
+        self.latest = {}
+        self.subscribers = {}
+
+    def on_tick(self, ticker: str, timestamp, price: float):
+        model = self.filters.get(ticker)
+        if model is None:
+            model = self.filters[ticker] = LocalLinearTrendFilter(price)
+        else:
+            model.update(price)
+
+        predictions, intervals = model.forecast(self.horizon_bars)
+        update = {
+            "ticker": ticker,
+            "timestamp": timestamp.isoformat(),
+            "last_price": price,
+            "level": model.level,
+            "slope_per_bar": model.slope,
+            "observations": model.observations,
+            "horizon_bars": self.horizon_bars,
+            "predictions": predictions,
+            "interval_95": intervals,
+        }
+        self.latest[ticker] = update
+        for subscriber in self.subscribers.get(ticker, ()):
+            if subscriber.full():
+                subscriber.get_nowait()  # Slow client: drop its oldest update
+            subscriber.put_nowait(update)
+        return update
+
+    def subscribe(self, ticker: str):
+        subscriber = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.setdefault(ticker, set()).add(subscriber)
+        if ticker in self.latest:
+            subscriber.put_nowait(self.latest[ticker])
+        return subscriber
+
+    def unsubscribe(self, ticker: str, subscriber):
+        self.subscribers.get(ticker, set()).discard(subscriber)
+
+    async def consume(self, source):
+        async for ticker, timestamp, price in source.ticks():
+            try:
+                self.on_tick(ticker, timestamp, price)
+            except Exception as e:
+                # One bad tick must not end the stream for every ticker
+                print(f"Skipping intraday tick for {ticker} at {timestamp}: {e}")
+
+# Shared hub used by the API
+intraday_hub = IntradayHub()
+_stream_task = None
+
+def start_stream():
+    """Starts consuming INTRADAY_SOURCE in the background, if configured."""
+    global _stream_task
+    if not INTRADAY_SOURCE or _stream_task is not None:
+        return
+    print(f"--- Starting intraday stream from {INTRADAY_SOURCE} ---")
+    _stream_task = asyncio.create_task(_run_stream(source_from_config(INTRADAY_SOURCE)))
+
+async def _run_stream(source):
+    try:
+        await intraday_hub.consume(source)
+        print("--- Intraday source finished ---")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Intraday stream stopped: {e}")
+
+async def stop_stream():
+    global _stream_task
+    if _stream_task is not None:
+        _stream_task.cancel()
+        try:
+            await _stream_task
+        except asyncio.CancelledError:
+            pass
+        _stream_task = None
@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import multiprocessing
+
+# --- Durable Local Job Queue (SQLite) ---
+# One row per (run_id, ticker). Every generation of a named run (e.g. one
+# day's suggestions for a horizon) gets its own run_id, owned by the
+# coordinator that started it under a renewed lease. If that coordinator
+# dies, the next one resumes the same run and skips the jobs that are
+# already "done". A coordinator that finds a live run joins it as an
+# extra worker instead of starting over.
+
+QUEUE_PATH = os.getenv("SUGGESTION_QUEUE_PATH", "suggestion_jobs.db")
+LEASE_SECONDS = 15 * 60   # A "running" job older than this is considered abandoned
+MAX_ATTEMPTS = 3
+# An abandoned run older than this is not resumed; a fresh one is started
+RUN_RESUME_SECONDS = int(os.getenv("SUGGESTION_RUN_RESUME_SECONDS", str(4 * 3600)))
+
+def _connect(path: str = QUEUE_PATH):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            run_id TEXT NOT NULL,
+            ticker TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            payload TEXT,
+            result TEXT,
+            error TEXT,
+            leased_until REAL,
+            updated_at REAL,
+            PRIMARY KEY (run_id, ticker)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            owner TEXT,
+            leased_until REAL,
+            created_at REAL NOT NULL
+        )
+    """)
+    return conn
+
+def start_run(name: str, owner: str, path: str = QUEUE_PATH):
+    """
+    Returns (run_id, role) for a coordinator of the named run:
+      "joined"  another coordinator is alive on the latest run; help drain it
+      "resumed" the latest run's coordinator died; take it over
+      "new"     nothing to resume; a fresh run_id was created
+    """
+    now = time.time()
+    conn = _connect(path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("""
+            SELECT run_id, leased_until FROM runs
+            WHERE name = ? AND status = 'running' AND created_at >= ?
+            ORDER BY created_at DESC LIMIT 1
+        """, (name, now - RUN_RESUME_SECONDS)).fetchone()
+        if row is not None and row[1] >= now:
+            role, run_id = "joined", row[0]
+        elif row is not None:
+            role, run_id = "resumed", row[0]
+            conn.execute("UPDATE runs SET owner = ?, leased_until = ? WHERE run_id = ?", (owner, now + LEASE_SECONDS, run_id))
+            # Jobs left running belong to the dead coordinator's workers
+            conn.execute("UPDATE jobs SET status = 'pending', leased_until = NULL WHERE run_id = ? AND status = 'running'", (run_id,))
+        else:
+            role, run_id = "new", f"{name}-{uuid.uuid4().hex[:8]}"
+            conn.execute(
+                "INSERT INTO runs (run_id, name, owner, leased_until, created_at) VALUES (?, ?, ?, ?, ?)",
+                (run_id, name, owner, now + LEASE_SECONDS, now)
+            )
+        conn.execute("COMMIT")
+        return run_id, role
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def _renew_run_lease(run_id: str, owner: str, stop: threading.Event, path: str):
+    conn = _connect(path)
+    try:
+        while not stop.wait(LEASE_SECONDS / 3):
+            conn.execute("UPDATE runs SET leased_until = ? WHERE run_id = ? AND owner = ?", (time.time() + LEASE_SECONDS, run_id, owner))
+    finally:
+        conn.close()
+
+def finish_run(run_id: str, owner: str, path: str = QUEUE_PATH):
+    conn = _connect(path)
+    try:
+        conn.execute("UPDATE runs SET status = 'done', leased_until = NULL WHERE run_id = ? AND owner = ?", (run_id, owner))
+    finally:
+        conn.close()
+
+def enqueue_jobs(run_id: str, jobs, path: str = QUEUE_PATH):
+    """
+    jobs is a list of (ticker, payload dict). Finished jobs are kept as-is;
+    unfinished ones get the new payload.
+    """
+    conn = _connect(path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("""
+            INSERT INTO jobs (run_id, ticker, payload, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (run_id, ticker) DO UPDATE SET payload = excluded.payload
+            WHERE jobs.status != 'done'
+        """, [(run_id, ticker, json.dumps(payload), time.time()) for ticker, payload in jobs])
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+def claim_job(conn, run_id: str):
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("""
+            SELECT ticker, payload FROM jobs
+            WHERE run_id = ? AND attempts < ?
+              AND (status = 'pending' OR (status = 'running' AND leased_until < ?))
+            LIMIT 1
+        """, (run_id, MAX_ATTEMPTS, now)).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute("""
+            UPDATE jobs SET status = 'running', attempts = attempts + 1, leased_until = ?, updated_at = ?
+            WHERE run_id = ? AND ticker = ?
+        """, (now + LEASE_SECONDS, now, run_id, row[0]))
+        conn.execute("COMMIT")
+        return row[0], json.loads(row[1])
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def complete_job(conn, run_id: str, ticker: str, result):
+    conn.execute(
+        "UPDATE jobs SET status = 'done', result = ?, error = NULL, leased_until = NULL, updated_at = ? WHERE run_id = ? AND ticker = ?",
+        (json.dumps(result), time.time(), run_id, ticker)
+    )
+
+def fail_job(conn, run_id: str, ticker: str, error: str):
+    conn.execute("""
+        UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+               error = ?, leased_until = NULL, updated_at = ?
+        WHERE run_id = ? AND ticker = ?
+    """, (MAX_ATTEMPTS, error, time.time(), run_id, ticker))
+
+def run_worker(run_id: str, handler, path: str = QUEUE_PATH):
+    """
+    Worker loop: claims jobs until the queue for run_id is drained.
+    handler(ticker, payload) returns a JSON-serializable result (or None).
+    """
+    conn = _connect(path)
+    try:
+        while True:
+            job = claim_job(conn, run_id)
+            if job is None:
+                break
+            ticker, payload = job
+            try:
+                complete_job(conn, run_id, ticker, handler(ticker, payload))
+            except Exception as e:
+                print(f"Job {ticker} in run {run_id} failed: {e}")
+                fail_job(conn, run_id, ticker, str(e))
+    finally:
+        conn.close()
+
+def collect_results(run_id: str, tickers=None, path: str = QUEUE_PATH):
+    conn = _connect(path)
+    try:
+        rows = conn.execute("SELECT ticker, result FROM jobs WHERE run_id = ? AND status = 'done'", (run_id,)).fetchall()
+    finally:
+        conn.close()
+    wanted = None if tickers is None else set(tickers)
+    return [json.loads(result) for ticker, result in rows if (wanted is None or ticker in wanted) and result]
+
+def _drain(run_id: str, handler, workers: int, path: str):
+    if workers <= 1:
+        run_worker(run_id, handler, path)
+        return
+    # spawn, not fork: the parent may already hold TensorFlow/DB state
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=run_worker, args=(run_id, handler, path)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+def process_run(name: str, jobs, handler, workers: int = 1, path: str = QUEUE_PATH):
+    """
+    Runs one generation of the named run: enqueues jobs, drains the queue
+    with `workers` processes (in-process when workers <= 1) and returns the
+    results of every done job. If another coordinator is already running
+    this name, helps it finish and returns that run's results instead.
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    run_id, role = start_run(name, owner, path)
+    if role == "joined":
+        print(f"--- Run {run_id} is already in progress; helping it finish ---")
+        _drain(run_id, handler, workers, path)
+        return collect_results(run_id, path=path)
+
+    if role == "resumed":
+        print(f"--- Resuming interrupted run {run_id} ---")
+    enqueue_jobs(run_id, jobs, path)
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_renew_run_lease, args=(run_id, owner, stop, path), daemon=True)
+    heartbeat.start()
+    try:
+        _drain(run_id, handler, workers, path)
+    finally:
+        stop.set()
+        heartbeat.join()
+    # Only a drained run is closed; after a crash it stays resumable
+    finish_run(run_id, owner, path)
+    return collect_results(run_id, [ticker for ticker, _ in jobs], path)
@@ -0,0 +1,104 @@
+import os
+import time
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import Future
+import numpy as np
+
+# --- Dynamic Micro-Batching for LSTM Inference ---
+# Concurrent predict calls against the same loaded model are gathered for
+# up to LSTM_BATCH_WAIT_MS (or until LSTM_BATCH_MAX_SIZE rows) and run as a
+# single batched predict. A wait of 0 turns batching off: lowest latency,
+# lowest throughput.
+LSTM_BATCH_MAX_SIZE = int(os.getenv("LSTM_BATCH_MAX_SIZE", "32"))
+LSTM_BATCH_WAIT_MS = float(os.getenv("LSTM_BATCH_WAIT_MS", "5"))
+
+class LSTMBatcher:
+    def __init__(self, max_batch_size: int = LSTM_BATCH_MAX_SIZE, max_wait_ms: float = LSTM_BATCH_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._batch_sizes = Counter()
+
+    def predict(self, model, X):
+        """Blocking; returns the predictions for this caller's rows only."""
+        if self.max_wait_ms <= 0:
+            self._record(1, len(X))
+            return model.predict(X, verbose=0)
+
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((model, X, future))
+        return future.result()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="lstm-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        pending = [self._queue.get()]
+        rows = len(pending[0][1])
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            rows += len(item[1])
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            # Only requests against the same model instance can share a predict call
+            groups = {}
+            for model, X, future in pending:
+                groups.setdefault(id(model), (model, []))[1].append((X, future))
+            for model, requests in groups.values():
+                self._predict_group(model, requests)
+
+    def _predict_group(self, model, requests):
+        try:
+            batch = np.concatenate([X for X, _ in requests], axis=0)
+            self._record(len(requests), len(batch))
+            predictions = model.predict(batch, verbose=0)
+        except Exception as e:
+            for _, future in requests:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for X, future in requests:
+            future.set_result(predictions[offset:offset + len(X)])
+            offset += len(X)
+
+    def _record(self, request_count: int, batch_size: int):
+        with self._lock:
+            self._requests += request_count
+            self._batches += 1
+            self._batch_sizes[batch_size] += 1
+
+    def get_metrics(self):
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "requests": self._requests,
+                "batches": self._batches,
+                "mean_batch_size": (sum(size * n for size, n in self._batch_sizes.items()) / self._batches) if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+            }
+
+# Shared instance used by the forecasting code
+lstm_batcher = LSTMBatcher()
@@ -0,0 +1,284 @@
+import os
+import time
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import pandas as pd
+import yfinance as yf
+from yfinance import multi as yf_multi
+from yfinance.exceptions import YFTickerMissingError
+
+# --- Resilient Market-Data Client ---
+# Every yfinance call in the app goes through one shared client that adds:
+#   * a token-bucket rate limit and bounded concurrency towards upstream,
+#     both counted in upstream requests (one per ticker)
+#   * timeouts and jittered exponential-backoff retries (longer after a 429)
+#   * request deduplication: identical in-flight calls share one result
+#   * a circuit breaker that serves the last good data while upstream is unhealthy
+#   * partial multi-ticker downloads: only the tickers that failed are retried
+# The upstream itself is a pluggable backend, so the client can be run
+# against a local fake that simulates latency and 429s.
+
+MARKET_RATE_PER_SECOND = float(os.getenv("MARKET_RATE_PER_SECOND", "10"))
+MARKET_BURST = int(os.getenv("MARKET_BURST", "50"))
+MARKET_MAX_CONCURRENCY = int(os.getenv("MARKET_MAX_CONCURRENCY", "4"))
+MARKET_MAX_RETRIES = int(os.getenv("MARKET_MAX_RETRIES", "3"))
+MARKET_TIMEOUT_SECONDS = float(os.getenv("MARKET_TIMEOUT_SECONDS", "10"))
+MARKET_BREAKER_FAILURES = int(os.getenv("MARKET_BREAKER_FAILURES", "5"))
+MARKET_BREAKER_RESET_SECONDS = float(os.getenv("MARKET_BREAKER_RESET_SECONDS", "60"))
+
+BACKOFF_BASE_SECONDS = 0.5
+RATE_LIMIT_BACKOFF_SECONDS = 5.0
+LAST_GOOD_MAX_ENTRIES = 1024
+
+class UpstreamUnavailableError(Exception):
+    pass
+
+def is_rate_limited(error: Exception):
+    if getattr(error, "status_code", None) == 429 or getattr(error, "status", None) == 429:
+        return True
+    message = str(error).lower()
+    return type(error).__name__ == "YFRateLimitError" or "429" in message or "too many requests" in message or "rate limit" in message
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1, timeout: float = None):
+        """
+        Takes `tokens` tokens, waiting until they are available. A request
+        larger than the capacity waits for a full bucket and leaves it in
+        debt, so later callers wait it off and the average rate holds.
+        """
+        needed = min(tokens, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return True
+                wait = (needed - self._tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+class CircuitBreaker:
+    """closed -> open after `failure_threshold` consecutive failures; one trial call after `reset_seconds`."""
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+# By default yfinance logs upstream errors and returns empty data, which
+# would look like an unknown ticker. Make it raise so retries, backoff and
+# the breaker see throttling and outages.
+yf.config.debug.hide_exceptions = False
+
+# "No such ticker / no prices" errors: an empty result, not an upstream failure
+MISSING_DATA_ERRORS = tuple(cls.__name__ for cls in (YFTickerMissingError, *YFTickerMissingError.__subclasses__()))
+
+class UpstreamError(Exception):
+    pass
+
+class PartialDownloadError(UpstreamError):
+    """Some tickers of a multi-ticker download failed; `data` holds the rest."""
+    def __init__(self, message: str, data, failed_tickers):
+        super().__init__(message)
+        self.data = data
+        self.failed_tickers = failed_tickers
+
+def ticker_count(tickers):
+    """Number of tickers in a yfinance tickers argument (a list or a space/comma separated string)."""
+    if isinstance(tickers, str):
+        return len(tickers.replace(",", " ").split())
+    return len(tickers)
+
+def merge_downloads(data, retried):
+    """Replaces the columns of the retried tickers in a multi-ticker download with the retry's."""
+    retried_tickers = retried.columns.get_level_values("Ticker").unique()
+    kept = data.loc[:, ~data.columns.get_level_values("Ticker").isin(retried_tickers)]
+    return pd.concat([kept, retried], axis=1).sort_index(axis=1)
+
+class YFinanceBackend:
+    def download(self, tickers, timeout: float, **kwargs):
+        # yf.download catches every ticker's exception (429s included) and
+        # only logs it. Run it with our own context so we can see the errors
+        # it recorded for this call. It sends one request per ticker; run them
+        # one after another so the client's concurrency limit is the real one.
+        ctx = yf_multi._DownloadCtx()
+        data = yf_multi._download_impl(ctx, tickers, progress=False, threads=False, timeout=timeout, **kwargs)
+        failures = {
+            ticker: error for ticker, error in ctx.errors.items()
+            if ticker in ctx.tracebacks and not error.startswith(MISSING_DATA_ERRORS)
+        }
+        if failures:
+            message = f"{len(failures)} of {len(ctx.dfs)} tickers failed: " + "; ".join(sorted(set(failures.values())))
+            if len(failures) == len(ctx.dfs):
+                raise UpstreamError(message)
+            raise PartialDownloadError(message, data, sorted(failures))
+        return data
+
+    def history(self, ticker: str, timeout: float, **kwargs):
+        try:
+            return yf.Ticker(ticker).history(timeout=timeout, **kwargs)
+        except YFTickerMissingError:
+            return pd.DataFrame()
+
+def _is_empty(result):
+    return getattr(result, "empty", False)
+
+class MarketDataClient:
+    def __init__(self, backend=None, rate_per_second: float = MARKET_RATE_PER_SECOND, burst: int = MARKET_BURST,
+                 max_concurrency: int = MARKET_MAX_CONCURRENCY, max_retries: int = MARKET_MAX_RETRIES,
+                 timeout: float = MARKET_TIMEOUT_SECONDS, breaker_failures: int = MARKET_BREAKER_FAILURES,
+                 breaker_reset_seconds: float = MARKET_BREAKER_RESET_SECONDS):
+        self.backend = backend or YFinanceBackend()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset_seconds)
+        self._concurrency = threading.BoundedSemaphore(max_concurrency)
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        self._last_good = OrderedDict()
+
+    # --- Public API (mirrors the yfinance calls used in the app) ---
+
+    def download(self, tickers, **kwargs):
+        key_tickers = tuple(tickers) if isinstance(tickers, (list, tuple)) else tickers
+        key = ("download", key_tickers, tuple(sorted(kwargs.items())))
+        return self._call(key, self.backend.download, tickers, **kwargs)
+
+    def history(self, ticker: str, **kwargs):
+        key = ("history", ticker, tuple(sorted(kwargs.items())))
+        return self._call(key, self.backend.history, ticker, **kwargs)
+
+    def get_status(self):
+        return {"breaker": self.breaker.state, "in_flight": len(self._in_flight), "cached_keys": len(self._last_good)}
+
+    # --- Internals ---
+
+    def _call(self, key, fn, *args, **kwargs):
+        # Deduplicate: identical concurrent calls wait on the first one
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._fetch(key, fn, *args, **kwargs)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(key, None)
+
+    def _fetch(self, key, fn, *args, **kwargs):
+        if not self.breaker.allow():
+            return self._serve_last_good(key, UpstreamUnavailableError("Market data upstream is unavailable (circuit open)."))
+
+        last_error = None
+        partial = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                backoff = RATE_LIMIT_BACKOFF_SECONDS if is_rate_limited(last_error) else BACKOFF_BASE_SECONDS
+                time.sleep(random.uniform(0, backoff * (2 ** (attempt - 1))))
+            try:
+                self.bucket.acquire(ticker_count(args[0]))
+                with self._concurrency:
+                    result = fn(*args, timeout=self.timeout, **kwargs)
+            except PartialDownloadError as e:
+                # Keep what arrived and retry only the tickers that failed
+                partial = e.data if partial is None else merge_downloads(partial, e.data)
+                args = (e.failed_tickers,) + args[1:]
+                last_error = e
+                print(f"Market data call {key[0]} partly failed (attempt {attempt + 1}): {e}")
+                continue
+            except Exception as e:
+                last_error = e
+                print(f"Market data call {key[0]} failed (attempt {attempt + 1}): {e}")
+                continue
+
+            self.breaker.record_success()
+            if partial is not None and not _is_empty(result):
+                result = merge_downloads(partial, result)
+            elif partial is not None:
+                result = partial
+            if _is_empty(result):
+                # Backends raise on upstream errors, so empty means unknown tickers
+                return self._last_good.get(key, (None, result))[1]
+            self._remember(key, result)
+            return result
+
+        if partial is not None:
+            # Upstream answered for the other tickers, so this isn't an outage
+            self.breaker.record_success()
+            print(f"Returning partial {key[0]} data without {', '.join(args[0])}: {last_error}")
+            return partial
+        self.breaker.record_failure()
+        return self._serve_last_good(key, last_error)
+
+    def _remember(self, key, result):
+        self._last_good[key] = (time.time(), result)
+        self._last_good.move_to_end(key)
+        while len(self._last_good) > LAST_GOOD_MAX_ENTRIES:
+            self._last_good.popitem(last=False)
+
+    def _serve_last_good(self, key, error: Exception):
+        if key in self._last_good:
+            fetched_at, result = self._last_good[key]
+            print(f"Serving last good {key[0]} data from {time.time() - fetched_at:.0f}s ago: {error}")
+            return result
+        raise error
+
+# Shared instance used across the app
+market_client = MarketDataClient()
@@ -1,5 +1,11 @@
-import yfinance as yf
+import os
 import pandas as pd
+import numpy as np
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .market_client import market_client
+from .universe import load_ticker_universe
 
 MAJOR_INDICES = {
     "S&P 500": "^GSPC",
@@ -7,17 +13,27 @@ MAJOR_INDICES = {
     "Dow Jones": "^DJI"
 }
 
-# A sample list of stocks to find top movers from
+# Default movers universe; set MOVERS_UNIVERSE_FILE (same format as
+# TICKER_UNIVERSE_FILE) to scan a larger list
 MOVER_TICKERS = [
     'AAPL', 'MSFT', 'GOOGL', 'NVDA', 'TSLA', 'AMZN', 'META', 'JPM', 
     'V', 'PG', 'JNJ', 'UNH', 'HD', 'MA', 'BAC', 'DIS'
 ]
+MOVERS_UNIVERSE_FILE = os.getenv("MOVERS_UNIVERSE_FILE")
+MOVERS_CHUNK_SIZE = int(os.getenv("MOVERS_CHUNK_SIZE", "100"))
+MOVERS_MAX_WORKERS = int(os.getenv("MOVERS_MAX_WORKERS", "4"))
+MOVERS_TOP_K = 5
+
+def load_mover_universe():
+    if MOVERS_UNIVERSE_FILE:
+        return load_ticker_universe(MOVERS_UNIVERSE_FILE)
+    return list(MOVER_TICKERS)
 
 def get_major_indices_data():
     indices_data = []
     for name, ticker in MAJOR_INDICES.items():
         try:
-            data = yf.Ticker(ticker).history(period="2d")
+            data = market_client.history(ticker, period="2d")
             if not data.empty:
                 price = data['Close'].iloc[-1]
                 change = price - data['Close'].iloc[-2]
@@ -32,32 +48,124 @@ def get_major_indices_data():
             print(f"Could not fetch data for index {name}: {e}")
     return indices_data
 
-def get_top_movers():
-    try:
-        data = yf.download(MOVER_TICKERS, period="2d", progress=False)
-        if data.empty:
-            return {"gainers": [], "losers": []}
-
-        close_prices = data['Close']
-        price_change_percent = ((close_prices.iloc[-1] - close_prices.iloc[-2]) / close_prices.iloc[-2]) * 100
+class MoversBoard:
+    """
+    Latest and previous close for every ticker in the universe, held in
+    flat arrays. Chunks of quotes overwrite their slots as they arrive, so
+    tickers whose chunk failed or hasn't landed yet keep their last values.
+    """
+    def __init__(self, tickers):
+        self.tickers = list(tickers)
+        self.slots = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.last = np.full(len(self.tickers), np.nan)
+        self.previous = np.full(len(self.tickers), np.nan)
+        self._lock = threading.Lock()
 
-        movers_df = pd.DataFrame({
-            'price': close_prices.iloc[-1],
-            'percent_change': price_change_percent
-        }).dropna()
-
-        gainers = movers_df.sort_values(by='percent_change', ascending=False).head(5)
-        losers = movers_df.sort_values(by='percent_change', ascending=True).head(5)
+    def update(self, tickers, last, previous):
+        slots = [self.slots[ticker] for ticker in tickers]
+        with self._lock:
+            self.last[slots] = last
+            self.previous[slots] = previous
 
+    def top_movers(self, k: int = MOVERS_TOP_K):
+        with self._lock:
+            last, previous = self.last.copy(), self.previous.copy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percent_change = (last - previous) / previous * 100
+        valid = np.flatnonzero(np.isfinite(percent_change))
         return {
-            "gainers": gainers.reset_index().rename(columns={'Ticker': 'ticker'}).to_dict('records'),
-            "losers": losers.reset_index().rename(columns={'Ticker': 'ticker'}).to_dict('records')
+            "gainers": self._records(_top_k(valid, percent_change[valid], k), last, percent_change),
+            "losers": self._records(_top_k(valid, -percent_change[valid], k), last, percent_change),
         }
-    except Exception as e:
-        print(f"Could not fetch top movers: {e}")
-        return {"gainers": [], "losers": []}
+
+    def _records(self, slots, last, percent_change):
+        return [{"ticker": self.tickers[i], "price": float(last[i]), "percent_change": float(percent_change[i])} for i in slots]
+
+def _top_k(slots, scores, k: int):
+    """The k slots with the highest scores, best first, without sorting the whole universe."""
+    k = min(k, len(slots))
+    if k == 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    return slots[top[np.argsort(-scores[top])]]
+
+def _fetch_mover_chunk(tickers):
+    data = market_client.download(tickers, period="2d")
+    if data is None or data.empty:
+        raise ValueError("no data returned")
+    close_prices = data['Close']
+    if isinstance(close_prices, pd.Series):
+        close_prices = close_prices.to_frame(tickers[0])
+    close_prices = close_prices.reindex(columns=tickers)
+    if len(close_prices) < 2:
+        raise ValueError("fewer than two bars returned")
+    closes = close_prices.to_numpy(dtype=float)
+    return closes[-1], closes[-2]
+
+# Built on first use from the configured universe
+mover_board = None
+
+def get_top_movers(on_update=None):
+    """
+    Fetches the movers universe in concurrent chunks and returns the top
+    gainers and losers. A chunk that fails is logged and skipped. If given,
+    on_update is called with the movers after every chunk that lands.
+    """
+    global mover_board
+    if mover_board is None:
+        mover_board = MoversBoard(load_mover_universe())
+    board = mover_board
+    chunks = [board.tickers[i:i + MOVERS_CHUNK_SIZE] for i in range(0, len(board.tickers), MOVERS_CHUNK_SIZE)]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(MOVERS_MAX_WORKERS, len(chunks)))) as executor:
+        futures = {executor.submit(_fetch_mover_chunk, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                last, previous = future.result()
+            except Exception as e:
+                print(f"Could not fetch top movers for {len(chunk)} tickers starting at {chunk[0]}: {e}")
+                continue
+            board.update(chunk, last, previous)
+            if on_update is not None:
+                on_update(board.top_movers())
+
+    return board.top_movers()
+
+# Short-lived cache so polling dashboards share one upstream fetch.
+# (data, fetched_at) is replaced as one tuple, so a reader never pairs one
+# overview with another's timestamp. The timestamp doubles as the data
+# version for HTTP cache validators.
+market_overview_cache = (None, 0)
+MARKET_OVERVIEW_CACHE_SECONDS = 60
+
+# Only one request refreshes an expired overview; the rest wait and reuse it
+_market_overview_lock = threading.Lock()
+
+def _market_overview_is_fresh(cached):
+    data, fetched_at = cached
+    return data is not None and time.time() - fetched_at < MARKET_OVERVIEW_CACHE_SECONDS
+
+def _publish_market_overview(indices, movers):
+    global market_overview_cache
+    market_overview_cache = ({"indices": indices, "movers": movers}, time.time())
 
 def get_market_overview():
-    indices = get_major_indices_data()
-    movers = get_top_movers()
-    return {"indices": indices, "movers": movers}
\ No newline at end of file
+    """Returns (overview, fetched_at) from one consistent snapshot."""
+    cached = market_overview_cache
+    if _market_overview_is_fresh(cached):
+        return cached
+
+    # With something cached, don't queue behind a refresh in progress: the
+    # cache is updated as each movers chunk lands
+    if not _market_overview_lock.acquire(blocking=cached[0] is None):
+        return market_overview_cache
+    try:
+        if _market_overview_is_fresh(market_overview_cache):
+            return market_overview_cache
+        indices = get_major_indices_data()
+        movers = get_top_movers(on_update=lambda partial: _publish_market_overview(indices, partial))
+        _publish_market_overview(indices, movers)
+        return market_overview_cache
+    finally:
+        _market_overview_lock.release()
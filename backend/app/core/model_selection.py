@@ -0,0 +1,122 @@
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from .. import crud
+from ..database import SessionLocal
+from .realtime_forecasting import run_all_forecasts_realtime
+
+# --- Champion/Challenger Model Selection ---
+# Each ticker has a persisted champion model. Normal requests only fit the
+# champion; the full ensemble is re-evaluated in the background for a
+# sampled fraction of requests and whenever the last evaluation is stale.
+# Only evaluations in which every model ran count: a run under a latency
+# budget can drop models, so background and scheduled evaluations run
+# without one.
+
+CHALLENGER_SAMPLE_RATE = float(os.getenv("CHALLENGER_SAMPLE_RATE", "0.1"))
+CHAMPION_REEVALUATE_HOURS = float(os.getenv("CHAMPION_REEVALUATE_HOURS", "24"))
+CHAMPION_PROMOTION_WINS = int(os.getenv("CHAMPION_PROMOTION_WINS", "1"))
+
+# One background evaluation at a time so challengers never compete with requests for CPU
+_evaluation_executor = ThreadPoolExecutor(max_workers=1)
+_pending_evaluations = set()
+_pending_lock = threading.Lock()
+
+def plan_models(ticker: str):
+    """
+    Returns (models_to_run, evaluate_in_background). models_to_run is None
+    when the ticker has no champion yet, meaning run the full ensemble.
+    """
+    db = SessionLocal()
+    try:
+        record = crud.get_model_champion(db, ticker)
+    finally:
+        db.close()
+
+    if record is None:
+        return None, False
+    stale = record.last_evaluated is None or datetime.utcnow() - record.last_evaluated > timedelta(hours=CHAMPION_REEVALUATE_HOURS)
+    sampled = random.random() < CHALLENGER_SAMPLE_RATE
+    return [record.champion], stale or sampled
+
+def champion_version(ticker: str):
+    """(champion, last evaluated) for a ticker, or None before its first evaluation."""
+    db = SessionLocal()
+    try:
+        record = crud.get_model_champion(db, ticker)
+    finally:
+        db.close()
+    if record is None:
+        return None
+    return record.champion, record.last_evaluated.isoformat() if record.last_evaluated else None
+
+def is_complete_evaluation(results: dict):
+    """True if every model got to run; results the scheduler skipped or cut off make no fair comparison."""
+    return not any(result.get("status") == "skipped" for result in results.values())
+
+def record_evaluation(ticker: str, results: dict):
+    """
+    Updates the champion record from a full-ensemble result dict. Returns
+    the champion, or None if the evaluation was incomplete or no model
+    succeeded, in which case nothing is recorded.
+    """
+    if not is_complete_evaluation(results):
+        return None
+    rmse_by_model = {
+        name: float(result["rmse"]) for name, result in results.items()
+        if result.get("status") == "success" and result.get("rmse") is not None
+    }
+    if not rmse_by_model:
+        return None
+    winner = min(rmse_by_model, key=rmse_by_model.get)
+
+    db = SessionLocal()
+    try:
+        return crud.record_model_evaluation(db, ticker, winner, rmse_by_model, CHAMPION_PROMOTION_WINS).champion
+    finally:
+        db.close()
+
+def schedule_evaluation(ticker: str, evaluate):
+    """Queues evaluate() (a full-ensemble run) unless one is already pending for this ticker."""
+    with _pending_lock:
+        if ticker in _pending_evaluations:
+            return
+        _pending_evaluations.add(ticker)
+
+    def run():
+        try:
+            result = evaluate()
+            if "error" not in result:
+                record_evaluation(ticker, result["results"])
+        except Exception as e:
+            print(f"Background model evaluation failed for {ticker}: {e}")
+        finally:
+            with _pending_lock:
+                _pending_evaluations.discard(ticker)
+
+    _evaluation_executor.submit(run)
+
+def stale_champion_tickers():
+    """Tickers whose last full evaluation is older than CHAMPION_REEVALUATE_HOURS."""
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(hours=CHAMPION_REEVALUATE_HOURS)
+        return [record.ticker for record in crud.get_stale_model_champions(db, cutoff)]
+    finally:
+        db.close()
+
+def reevaluate_stale_champions(horizon: int = 5):
+    """Scheduled job: runs the full ensemble for every ticker with a stale evaluation."""
+    for ticker in stale_champion_tickers():
+        result = run_all_forecasts_realtime(ticker, horizon)
+        if "error" in result:
+            print(f"Could not re-evaluate models for {ticker}: {result['error']}")
+            continue
+        champion = record_evaluation(ticker, result["results"])
+        if champion is None:
+            print(f"Re-evaluation of {ticker} was incomplete; keeping the current champion")
+            continue
+        print(f"Re-evaluated {ticker}: champion is {champion}")
@@ -0,0 +1,131 @@
+import os
+import asyncio
+import calendar
+from datetime import datetime, timezone
+import httpx
+import feedparser
+
+from .. import crud
+from ..database import SessionLocal
+
+# --- Async News Fetching ---
+# Base URLs are configurable so the fetcher can be pointed at a local
+# RSS/JSON stand-in server.
+YAHOO_SEARCH_URL = os.getenv("NEWS_YAHOO_SEARCH_URL", "https://query1.finance.yahoo.com/v1/finance/search")
+GOOGLE_NEWS_RSS_URL = os.getenv("NEWS_GOOGLE_RSS_URL", "https://news.google.com/rss/search")
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("NEWS_TIMEOUT_SECONDS", "5"))
+MAX_CONCURRENT_TICKERS = int(os.getenv("NEWS_MAX_CONCURRENCY", "8"))
+HEADLINES_PER_TICKER = 8
+
+# ticker -> company name, filled from the Yahoo search response
+company_names = {}
+
+_client = None
+_client_loop = None
+_semaphore = None
+
+def get_client():
+    """One pooled client per event loop, reused across requests."""
+    global _client, _client_loop, _semaphore
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(REQUEST_TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            headers={"User-Agent": "Mozilla/5.0 (Foresight AI news fetcher)"},
+            follow_redirects=True,
+        )
+        _client_loop = loop
+        _semaphore = asyncio.Semaphore(MAX_CONCURRENT_TICKERS)
+    return _client
+
+async def close_client():
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+        _client, _client_loop = None, None
+
+def _from_timestamp(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(tzinfo=None)
+
+async def _fetch_yahoo_news(client, ticker: str):
+    response = await client.get(YAHOO_SEARCH_URL, params={"q": ticker, "newsCount": HEADLINES_PER_TICKER, "quotesCount": 1})
+    response.raise_for_status()
+    payload = response.json()
+
+    quotes = payload.get("quotes") or []
+    if quotes and ticker not in company_names:
+        name = quotes[0].get("longname") or quotes[0].get("shortname")
+        if name:
+            company_names[ticker] = name
+
+    headlines = []
+    for article in (payload.get("news") or [])[:HEADLINES_PER_TICKER]:
+        if article.get("title"):
+            published = article.get("providerPublishTime")
+            headlines.append({
+                "title": article["title"], "link": article.get("link"), "source": "yahoo",
+                "published_at": _from_timestamp(published) if published else datetime.utcnow()
+            })
+    return headlines
+
+async def _fetch_google_news(client, ticker: str):
+    query = f"{company_names.get(ticker, ticker)} stock"
+    response = await client.get(GOOGLE_NEWS_RSS_URL, params={"q": query, "hl": "en-US", "gl": "US", "ceid": "US:en"})
+    response.raise_for_status()
+    feed = feedparser.parse(response.text)
+
+    headlines = []
+    for entry in feed.entries[:HEADLINES_PER_TICKER]:
+        if entry.get("title"):
+            published = entry.get("published_parsed")
+            headlines.append({
+                "title": entry.title, "link": entry.get("link"), "source": "google_rss",
+                "published_at": _from_timestamp(calendar.timegm(published)) if published else datetime.utcnow()
+            })
+    return headlines
+
+def _store_new_headlines(ticker: str, headlines: list):
+    db = SessionLocal()
+    try:
+        # Deduplicated on (ticker, title): provider timestamps aren't comparable
+        # across sources, and untimestamped items are stamped with the fetch time
+        return crud.add_headlines(db, ticker, headlines)
+    finally:
+        db.close()
+
+def _load_recent_headlines(ticker: str):
+    db = SessionLocal()
+    try:
+        return [
+            {"id": h.id, "title": h.title, "sentiment": h.sentiment}
+            for h in crud.get_recent_headlines(db, ticker, HEADLINES_PER_TICKER)
+        ]
+    finally:
+        db.close()
+
+async def fetch_headlines(ticker: str):
+    """
+    Pulls the latest headlines for a ticker (Yahoo first, Google News RSS as
+    a fallback), stores the ones not stored yet, and returns the most
+    recent stored headlines.
+    """
+    client = get_client()
+    async with _semaphore:
+        headlines = []
+        try:
+            headlines = await _fetch_yahoo_news(client, ticker)
+        except Exception as e:
+            print(f"Yahoo news request failed for {ticker}: {e}")
+
+        if not headlines:
+            print(f"yfinance failed for {ticker}, falling back to Google News RSS...")
+            try:
+                headlines = await _fetch_google_news(client, ticker)
+            except Exception as e:
+                print(f"Google News request failed for {ticker}: {e}")
+
+    if headlines:
+        new_count = await asyncio.to_thread(_store_new_headlines, ticker, headlines)
+        print(f"Stored {new_count} new headlines for {ticker}.")
+    return await asyncio.to_thread(_load_recent_headlines, ticker)
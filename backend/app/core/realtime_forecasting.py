@@ -1,24 +1,31 @@
 import pandas as pd
-import yfinance as yf
 from statsmodels.tsa.arima.model import ARIMA
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 from prophet import Prophet
-from sklearn.preprocessing import MinMaxScaler
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense
 import numpy as np
 from sklearn.metrics import mean_squared_error
 import warnings
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from .market_client import market_client
+from .features import feature_cache
 
 warnings.filterwarnings("ignore")
 
 # --- Model Implementations (Real-Time Training) ---
+# Each runner takes the ticker's SeriesFeatures (see features.py) so the
+# derived inputs are prepared once and shared by all models.
 
-def run_arima(series, horizon):
+def run_arima(features, horizon):
     try:
-        if len(series) < horizon * 2:
+        if len(features.series) < horizon * 2:
             raise ValueError("Not enough data for ARIMA model.")
-        train_data, test_data = series[:-horizon], series[-horizon:]
+        train_data, test_data = features.split(horizon)
         model = ARIMA(train_data, order=(5, 1, 0))
         model_fit = model.fit()
         forecast = model_fit.forecast(steps=horizon)
@@ -30,11 +37,11 @@ def run_arima(series, horizon):
     except Exception as e:
         return {"status": "failed", "error_message": str(e)}
 
-def run_sarima(series, horizon):
+def run_sarima(features, horizon):
     try:
-        if len(series) < horizon * 2:
+        if len(features.series) < horizon * 2:
             raise ValueError("Not enough data for SARIMA model.")
-        train_data, test_data = series[:-horizon], series[-horizon:]
+        train_data, test_data = features.split(horizon)
         model = SARIMAX(train_data, order=(1, 1, 1), seasonal_order=(1, 1, 1, 12))
         model_fit = model.fit(disp=False)
         forecast = model_fit.forecast(steps=horizon)
@@ -46,15 +53,14 @@ def run_sarima(series, horizon):
     except Exception as e:
         return {"status": "failed", "error_message": str(e)}
 
-def run_prophet(series, horizon):
+def run_prophet(features, horizon):
     try:
-        if len(series) < 30:
+        if len(features.series) < 30:
             raise ValueError("Not enough data for Prophet model.")
-        df = series.reset_index(); df.columns = ['ds', 'y']
-        model = Prophet(); model.fit(df)
+        model = Prophet(); model.fit(features.prophet_frame)
         future = model.make_future_dataframe(periods=horizon)
         forecast = model.predict(future)
-        y_pred, y_true = forecast['yhat'][-horizon:].values, series[-horizon:].values
+        y_pred, y_true = forecast['yhat'][-horizon:].values, features.split(horizon)[1].values
         rmse = np.sqrt(mean_squared_error(y_true, y_pred))
         return {
             "status": "success", "rmse": rmse, "last_pred": forecast['yhat'].iloc[-1],
@@ -63,19 +69,12 @@ def run_prophet(series, horizon):
     except Exception as e:
         return {"status": "failed", "error_message": str(e)}
 
-def run_lstm(series, horizon):
+def run_lstm(features, horizon):
     try:
-        if len(series) < 60:
+        if len(features.series) < 60:
             raise ValueError("Not enough data for LSTM model.")
-        data = series.values.reshape(-1, 1)
-        scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_data = scaler.fit_transform(data)
-        look_back = 60
-        X, y = [], []
-        for i in range(look_back, len(scaled_data)):
-            X.append(scaled_data[i-look_back:i, 0]); y.append(scaled_data[i, 0])
-        X, y = np.array(X), np.array(y)
-        X = np.reshape(X, (X.shape[0], X.shape[1], 1))
+        scaler = features.lstm_scaler
+        X, y = features.lstm_windows()
         test_size, train_size = horizon, len(X) - horizon
         X_train, X_test = X[0:train_size], X[train_size:len(X)]
         y_train, y_test = y[0:train_size], y[train_size:len(y)]
@@ -95,24 +94,181 @@ def run_lstm(series, horizon):
     except Exception as e:
         return {"status": "failed", "error_message": str(e)}
 
-def run_all_forecasts_realtime(ticker: str, horizon: int):
+# --- Deadline-Aware Scheduling ---
+
+MODEL_RUNNERS = {
+    'arima': run_arima,
+    'sarima': run_sarima,
+    'prophet': run_prophet,
+    'lstm': run_lstm,
+}
+
+# Rough first-run estimates (seconds) used until a ticker has recorded history
+DEFAULT_FIT_SECONDS = {'arima': 2.0, 'prophet': 5.0, 'lstm': 15.0, 'sarima': 30.0}
+FIT_TIME_SMOOTHING = 0.3
+
+# In-memory fit-time history: {(ticker, model_name): smoothed seconds}
+fit_time_history = {}
+
+# Shared pool so a model that blows its deadline doesn't block the next
+# request. A fit holds one of MODEL_FIT_SLOTS slots from submission until it
+# actually finishes (cut off or not), and a model is only started when a
+# slot is free, so new fits never queue behind abandoned ones.
+MODEL_FIT_SLOTS = int(os.getenv("MODEL_FIT_SLOTS", str(len(MODEL_RUNNERS) * 2)))
+# A fit not expected to finish with FIT_SAFETY_MARGIN to spare may be cut
+# off, so it also needs one of MAX_ABANDONED_FITS tokens, held until it
+# finishes. This bounds how many cut-off fits can be left running and keeps
+# the other slots for fits that will complete.
+MAX_ABANDONED_FITS = int(os.getenv("MAX_ABANDONED_FITS", str(len(MODEL_RUNNERS))))
+FIT_SAFETY_MARGIN = 2.0
+
+_model_executor = ThreadPoolExecutor(max_workers=MODEL_FIT_SLOTS)
+_fit_slots = threading.BoundedSemaphore(MODEL_FIT_SLOTS)
+_slow_fit_tokens = threading.BoundedSemaphore(MAX_ABANDONED_FITS)
+
+def estimated_fit_seconds(ticker: str, model_name: str):
+    return fit_time_history.get((ticker, model_name), DEFAULT_FIT_SECONDS[model_name])
+
+def record_fit_time(ticker: str, model_name: str, seconds: float):
+    key = (ticker, model_name)
+    previous = fit_time_history.get(key)
+    if previous is None:
+        fit_time_history[key] = seconds
+    else:
+        fit_time_history[key] = FIT_TIME_SMOOTHING * seconds + (1 - FIT_TIME_SMOOTHING) * previous
+
+def _run_timed(ticker: str, model_name: str, features, horizon: int, fit: dict):
+    """Runs one model in the pool; fit time is measured here, from when the fit actually starts."""
+    try:
+        fit["started"] = time.monotonic()
+        result = MODEL_RUNNERS[model_name](features, horizon)
+        record_fit_time(ticker, model_name, time.monotonic() - fit["started"])
+        return result
+    finally:
+        _release_fit(fit["slow"])
+
+def _release_fit(slow: bool):
+    if slow:
+        _slow_fit_tokens.release()
+    _fit_slots.release()
+
+def _skipped(message: str):
+    return {"status": "skipped", "error_message": message}
+
+def run_models_within_budget(ticker: str, series, horizon: int, budget_seconds=None, models=None):
+    """
+    Runs the models (all of MODEL_RUNNERS unless a subset is given)
+    cheapest-first (by recorded fit time for this ticker).
+    Models that would not fit in what is left of the budget, or that find
+    no free fit slot, are skipped, and a model still running when the
+    budget runs out is cut off. Without a budget every model runs, waiting
+    for a fit slot if need be.
+    Returns (results, dropped_models).
+    """
+    schedule = sorted(models or MODEL_RUNNERS, key=lambda name: estimated_fit_seconds(ticker, name))
+    features = feature_cache.get(ticker, series)
+    deadline = None if budget_seconds is None else time.monotonic() + budget_seconds
+    results, dropped_models = {}, []
+
+    for model_name in schedule:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        estimate = estimated_fit_seconds(ticker, model_name)
+        if remaining is not None and estimate > remaining:
+            results[model_name] = _skipped("Skipped: not enough time left in the latency budget.")
+            dropped_models.append(model_name)
+            continue
+
+        slow = remaining is not None and estimate * FIT_SAFETY_MARGIN > remaining
+        if slow and not _slow_fit_tokens.acquire(blocking=False):
+            results[model_name] = _skipped("Skipped: too many slow fits still running.")
+            dropped_models.append(model_name)
+            continue
+        if not _fit_slots.acquire(blocking=deadline is None):
+            if slow:
+                _slow_fit_tokens.release()
+            results[model_name] = _skipped("Skipped: all model workers are busy.")
+            dropped_models.append(model_name)
+            continue
+
+        fit = {"slow": slow}
+        future = _model_executor.submit(_run_timed, ticker, model_name, features, horizon, fit)
+        try:
+            results[model_name] = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            # The fit keeps running in the pool (holding its slot) but we stop
+            # waiting; it records its real fit time when it finishes. Until
+            # then, how long it has already run is a lower bound on that time.
+            started = fit.get("started")
+            if started is not None:
+                fit_time_history[(ticker, model_name)] = max(estimate, time.monotonic() - started)
+            results[model_name] = _skipped("Cut off: exceeded the latency budget.")
+            dropped_models.append(model_name)
+
+    return results, dropped_models
+
+def add_horizon_results(results: dict, horizons, actual=None, default_best=None):
+    """
+    Slices each model's longest-horizon forecast path into one result per
+    requested horizon, so several horizons cost a single fit per model.
+    actual is the holdout the path was scored against (None = no RMSE).
+    Returns the best model per horizon: the lowest RMSE, else default_best,
+    else None.
+    """
+    actual = None if actual is None else np.asarray(actual, dtype=float).ravel()
+    for result in results.values():
+        path = result.get("predictions")
+        if result.get("status") != "success" or not path:
+            continue
+        per_horizon = []
+        for h in horizons:
+            if h > len(path):
+                continue
+            rmse = None if actual is None else float(np.sqrt(mean_squared_error(actual[:h], path[:h])))
+            per_horizon.append({"horizon": h, "last_pred": path[h - 1], "rmse": rmse, "predictions": path[:h]})
+        result["horizons"] = per_horizon
+
+    summary = []
+    for h in horizons:
+        candidates = {
+            name: entry for name, result in results.items()
+            for entry in result.get("horizons", []) if entry["horizon"] == h
+        }
+        if not candidates:
+            continue
+        scored = {name: entry for name, entry in candidates.items() if entry["rmse"] is not None}
+        if scored:
+            best = min(scored, key=lambda name: scored[name]["rmse"])
+        elif default_best in candidates:
+            best = default_best
+        else:
+            # Nothing to rank by, and the caller's pick has no path for this horizon
+            summary.append({"horizon": h, "best_model": None})
+            continue
+        summary.append({"horizon": h, "best_model": best, "last_pred": candidates[best]["last_pred"], "rmse": candidates[best]["rmse"]})
+    return summary
+
+def run_all_forecasts_realtime(ticker: str, horizon: int, budget_seconds=None, series=None, models=None, horizons=None):
     """
     This is the main orchestrator for on-demand training.
+    If budget_seconds is given, the whole ensemble is bounded by it and any
+    model that could not finish in time is listed in "dropped_models".
+    Pass series (e.g. attached from shared memory) to skip the download,
+    and models to fit only a subset of MODEL_RUNNERS. With a list of
+    horizons, horizon should be the longest one and each model's path is
+    sliced per horizon instead of refitting.
     """
     try:
-        data = yf.download(ticker, period="3y", interval="1d", progress=False)
-        if data.empty:
+        if series is None:
+            data = market_client.download(ticker, period="3y", interval="1d")
+            if data.empty:
+                raise ValueError(f"No data found for ticker {ticker}")
+            series = data['Close']
+        elif series.empty:
             raise ValueError(f"No data found for ticker {ticker}")
 
-        series = data['Close']
         current_price = series.iloc[-1] # --- 1. GET THE CURRENT PRICE ---
 
-        results = {
-            'arima': run_arima(series, horizon),
-            'sarima': run_sarima(series, horizon),
-            'prophet': run_prophet(series, horizon),
-            'lstm': run_lstm(series, horizon)
-        }
+        results, dropped_models = run_models_within_budget(ticker, series, horizon, budget_seconds, models)
 
         best_model, min_rmse = None, float('inf')
         for model_name, result in results.items():
@@ -120,12 +276,17 @@ def run_all_forecasts_realtime(ticker: str, horizon: int):
                 min_rmse, best_model = result['rmse'], model_name
 
         # --- 2. ADD THE CURRENT PRICE TO THE RESPONSE ---
-        return {
+        response = {
             "ticker": ticker, 
             "horizon": horizon, 
             "results": results,
             "best_model": best_model,
-            "current_price": current_price 
+            "current_price": current_price,
+            "dropped_models": dropped_models
         }
+        if horizons:
+            # Every model is scored on the same holdout: the last `horizon` bars
+            response["horizons"] = add_horizon_results(results, horizons, series[-horizon:], best_model)
+        return response
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
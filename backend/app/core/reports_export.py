@@ -0,0 +1,120 @@
+import io
+import time
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .. import crud
+from .market_client import market_client
+
+# --- Streaming Suggestion History Export ---
+# History is read in fixed-size chunks from a server-side cursor and each
+# chunk is scored against one price snapshot, so memory stays constant no
+# matter how many rows are exported.
+
+EXPORT_CHUNK_SIZE = 5000
+MAX_EXPORT_CHUNK_SIZE = 50000   # Largest chunk a client may ask for; bounds per-request memory
+# The reports view reuses a price snapshot for this long, so polling
+# clients see the same data version (and get 304s) between refreshes
+PRICE_SNAPSHOT_CACHE_SECONDS = 60
+HISTORY_COLUMNS = ["date_suggested", "ticker", "price_at_suggestion", "predicted_price", "best_model"]
+EXPORT_COLUMNS = HISTORY_COLUMNS + ["current_price", "performance_percent", "predicted_growth_percent"]
+
+EXPORT_SCHEMA = pa.schema([
+    ("date_suggested", pa.date32()),
+    ("ticker", pa.string()),
+    ("price_at_suggestion", pa.float64()),
+    ("predicted_price", pa.float64()),
+    ("best_model", pa.string()),
+    ("current_price", pa.float64()),
+    ("performance_percent", pa.float64()),
+    ("predicted_growth_percent", pa.float64()),
+])
+
+def fetch_price_snapshot(tickers):
+    """Latest close per ticker as a Series (one download for the whole export)."""
+    if not tickers:
+        return pd.Series(dtype=float)
+    close_prices = market_client.download(tickers, period="5d")['Close']
+    if isinstance(close_prices, pd.Series):
+        close_prices = close_prices.to_frame(tickers[0])
+    return close_prices.ffill().iloc[-1]
+
+# (tickers, snapshot, fetched_at), replaced as one tuple
+price_snapshot_cache = ((), None, 0)
+_price_snapshot_lock = threading.Lock()
+
+def get_price_snapshot(tickers):
+    """
+    Like fetch_price_snapshot, but reuses a snapshot of the same tickers
+    fetched in the last PRICE_SNAPSHOT_CACHE_SECONDS.
+    """
+    global price_snapshot_cache
+    tickers = tuple(sorted(tickers))
+    with _price_snapshot_lock:
+        cached_tickers, snapshot, fetched_at = price_snapshot_cache
+        if snapshot is None or cached_tickers != tickers or time.time() - fetched_at >= PRICE_SNAPSHOT_CACHE_SECONDS:
+            snapshot = fetch_price_snapshot(list(tickers))
+            price_snapshot_cache = (tickers, snapshot, time.time())
+        return snapshot
+
+def score_chunk(rows, price_snapshot):
+    """Vectorized performance for one chunk of history rows."""
+    frame = pd.DataFrame.from_records(rows, columns=HISTORY_COLUMNS)
+    frame["current_price"] = frame["ticker"].map(price_snapshot).astype(float)
+    entry = frame["price_at_suggestion"]
+    frame["performance_percent"] = (frame["current_price"] - entry) / entry * 100
+    frame["predicted_growth_percent"] = (frame["predicted_price"] - entry) / entry * 100
+    return frame
+
+def iter_scored_chunks(db, chunk_size: int = EXPORT_CHUNK_SIZE):
+    price_snapshot = fetch_price_snapshot(crud.get_suggestion_history_tickers(db))
+    for rows in crud.iter_suggestion_history_chunks(db, chunk_size):
+        yield score_chunk(rows, price_snapshot)
+
+def iter_csv(db, chunk_size: int = EXPORT_CHUNK_SIZE):
+    yield ",".join(EXPORT_COLUMNS) + "\n"
+    for frame in iter_scored_chunks(db, chunk_size):
+        yield frame.to_csv(header=False, index=False)
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only sink that hands out what has been written so far."""
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def iter_parquet(db, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """One Parquet row group per chunk, flushed to the client as it is written."""
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, EXPORT_SCHEMA)
+    try:
+        for frame in iter_scored_chunks(db, chunk_size):
+            writer.write_table(pa.Table.from_pandas(frame, schema=EXPORT_SCHEMA, preserve_index=False))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+EXPORT_FORMATS = {
+    "csv": (iter_csv, "text/csv"),
+    "parquet": (iter_parquet, "application/vnd.apache.parquet"),
+}
@@ -1,12 +1,56 @@
-import yfinance as yf
-from transformers import pipeline
-import feedparser
-from urllib.parse import quote_plus
+import os
+import io
+import time
+import asyncio
+import torch
+from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+
+from . import news_fetcher
+from .. import crud
+from ..database import SessionLocal
+
+SENTIMENT_MODEL_NAME = "ProsusAI/finbert"
+
+# Dynamic int8 quantization of the Linear layers for GPU-less hosts
+SENTIMENT_QUANTIZE = os.getenv("SENTIMENT_QUANTIZE", "false").lower() == "true"
+# Intra-op threads for CPU inference (0 = leave torch's default)
+SENTIMENT_NUM_THREADS = int(os.getenv("SENTIMENT_NUM_THREADS", "0"))
+
+# Fixed headline set used to check the quantized model against full precision
+PARITY_HEADLINES = [
+    "Company beats quarterly earnings expectations and raises full-year guidance",
+    "Shares tumble after regulator opens investigation into accounting practices",
+    "Board approves $10 billion share buyback program",
+    "CEO resigns unexpectedly amid weak sales",
+    "Company to hold annual shareholder meeting on Thursday",
+    "Analysts downgrade stock to sell on margin pressure",
+    "Revenue grows 25% as cloud demand accelerates",
+    "Firm announces layoffs of 5% of its workforce",
+    "Stock closes flat ahead of Federal Reserve decision",
+    "Supplier shortage expected to delay product launch into next year",
+    "Dividend raised for the tenth consecutive year",
+    "Company files for Chapter 11 bankruptcy protection",
+    "New partnership expands distribution into European markets",
+    "Quarterly results in line with consensus estimates",
+    "Credit rating cut to junk by Moody's",
+    "Record deliveries reported for the third quarter",
+]
 
 # --- THIS IS THE KEY CHANGE ---
 # 1. Don't load the model immediately. Initialize it as None.
 sentiment_pipeline = None
 
+def load_sentiment_pipeline(quantize: bool = False, num_threads: int = 0):
+    """Builds a CPU FinBERT pipeline, optionally with int8 dynamic quantization."""
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL_NAME)
+    model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL_NAME)
+    model.eval()
+    if quantize:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer, device=-1)
+
 def get_sentiment_pipeline():
     """
     This function loads the sentiment model on demand and caches it.
@@ -14,59 +58,77 @@ def get_sentiment_pipeline():
     global sentiment_pipeline
     # 2. If the model hasn't been loaded yet, load it now.
     if sentiment_pipeline is None:
-        print("--- Initializing sentiment analysis model for the first time... ---")
-        sentiment_pipeline = pipeline("sentiment-analysis", model="ProsusAI/finbert")
+        mode = "quantized int8" if SENTIMENT_QUANTIZE else "full precision"
+        print(f"--- Initializing sentiment analysis model ({mode}) for the first time... ---")
+        sentiment_pipeline = load_sentiment_pipeline(SENTIMENT_QUANTIZE, SENTIMENT_NUM_THREADS)
     return sentiment_pipeline
 
-def get_news_sentiment(ticker: str):
+def _model_size_mb(model):
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes / (1024 * 1024)
+
+def _time_labels(pipeline_to_use, headlines):
+    pipeline_to_use(headlines[:2])  # Warm-up
+    started = time.perf_counter()
+    labels = [pipeline_to_use(title)[0]['label'].lower() for title in headlines]
+    latency_ms = (time.perf_counter() - started) * 1000 / len(headlines)
+    return labels, latency_ms
+
+def check_quantization_parity(headlines=PARITY_HEADLINES, num_threads: int = SENTIMENT_NUM_THREADS):
+    """
+    Runs the full-precision and quantized models over the same headlines and
+    reports label agreement, serialized model size and per-headline latency.
+    """
+    full_pipeline = load_sentiment_pipeline(quantize=False, num_threads=num_threads)
+    quantized_pipeline = load_sentiment_pipeline(quantize=True, num_threads=num_threads)
+
+    full_labels, full_latency = _time_labels(full_pipeline, headlines)
+    quantized_labels, quantized_latency = _time_labels(quantized_pipeline, headlines)
+
+    matches = sum(1 for a, b in zip(full_labels, quantized_labels) if a == b)
+    return {
+        "headline_count": len(headlines),
+        "agreement": matches / len(headlines),
+        "disagreements": [
+            (title, a, b) for title, a, b in zip(headlines, full_labels, quantized_labels) if a != b
+        ],
+        "full_precision": {"size_mb": _model_size_mb(full_pipeline.model), "latency_ms_per_headline": full_latency},
+        "quantized": {"size_mb": _model_size_mb(quantized_pipeline.model), "latency_ms_per_headline": quantized_latency},
+    }
+
+def classify_headlines(titles):
+    """Runs the (lazy-loaded) model over a batch of headlines, returns lowercase labels."""
+    pipeline_to_use = get_sentiment_pipeline()
+    return [result['label'].lower() for result in pipeline_to_use(titles)]
+
+async def get_news_sentiment(ticker: str):
     """
     Fetches news and analyzes sentiment, using the lazy-loaded model.
+    Headlines already scored on an earlier call are not run through the
+    model again.
     """
     print(f"--- Fetching and analyzing news for {ticker} ---")
     try:
-        # 3. Call the function to get the model.
-        #    The first time this runs, it will be slow. Subsequent times, it will be instant.
-        pipeline_to_use = get_sentiment_pipeline()
-        
-        stock = yf.Ticker(ticker)
-        news = stock.news
-        headlines_to_process = []
-
-        # ... (The rest of your news fetching logic remains exactly the same) ...
-        if news:
-            print(f"Found {len(news)} headlines for {ticker} via yfinance.")
-            for article in news[:8]:
-                title = article.get('title')
-                if title:
-                    headlines_to_process.append(title)
-
-        if not headlines_to_process:
-            print(f"yfinance failed for {ticker}, falling back to Google News RSS...")
-            company_name = stock.info.get('longName', ticker)
-            query = quote_plus(f"{company_name} stock")
-            feed_url = f"https://news.google.com/rss/search?q={query}&hl=en-US&gl=US&ceid=US:en"
-            feed = feedparser.parse(feed_url)
-            for entry in feed.entries[:8]:
-                if entry.title:
-                    headlines_to_process.append(entry.title)
-
-        if not headlines_to_process:
+        headlines = await news_fetcher.fetch_headlines(ticker)
+
+        if not headlines:
             return {
                 "overall_sentiment": "Neutral", "score": 0.5,
                 "headlines": [{"title": "No recent news found for this stock.", "sentiment": "neutral"}]
             }
 
-        analyzed_headlines = []
-        positive_score = 0
-        count = 0
-
-        for title in headlines_to_process:
-            # 4. Use the loaded model.
-            result = pipeline_to_use(title)[0]
-            analyzed_headlines.append({"title": title, "sentiment": result['label'].lower()})
-            if result['label'].lower() == 'positive':
-                positive_score += 1
-            count += 1
+        # The first call loads the model, so keep it off the event loop
+        unscored = [h for h in headlines if h["sentiment"] is None]
+        if unscored:
+            labels = await asyncio.to_thread(classify_headlines, [h["title"] for h in unscored])
+            for headline, label in zip(unscored, labels):
+                headline["sentiment"] = label
+            await asyncio.to_thread(_save_sentiments, {h["id"]: h["sentiment"] for h in unscored})
+
+        analyzed_headlines = [{"title": h["title"], "sentiment": h["sentiment"]} for h in headlines]
+        positive_score = sum(1 for h in headlines if h["sentiment"] == 'positive')
+        count = len(headlines)
         
         overall_score = positive_score / count if count > 0 else 0.5
         overall_sentiment = "Positive" if overall_score > 0.6 else "Negative" if overall_score < 0.4 else "Neutral"
@@ -77,4 +139,11 @@ def get_news_sentiment(ticker: str):
         }
     except Exception as e:
         print(f"Could not get news sentiment for {ticker}: {e}")
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+def _save_sentiments(sentiments: dict):
+    db = SessionLocal()
+    try:
+        crud.update_headline_sentiments(db, sentiments)
+    finally:
+        db.close()
@@ -0,0 +1,70 @@
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+# --- Shared-Memory Price Plane ---
+# The coordinator publishes each ticker's close history once; worker
+# processes attach to it read-only by name. A handle is a small JSON-safe
+# dict, so it can travel in a job payload instead of the Series itself.
+#
+# Block layout for n bars: n int64 timestamps (ns) followed by n float64 closes.
+
+# Blocks owned by this process: {name: SharedMemory}
+_published = {}
+# Blocks this process has attached to: {name: (SharedMemory, Series)}
+_attached = {}
+
+def publish_series(ticker: str, series):
+    """Copies a price Series into a new shared-memory block and returns its handle."""
+    series = series.dropna()
+    length = len(series)
+    shm = shared_memory.SharedMemory(create=True, size=max(length * 16, 1))
+    np.ndarray((length,), dtype=np.int64, buffer=shm.buf)[:] = pd.DatetimeIndex(series.index).values.astype("datetime64[ns]").view(np.int64)
+    np.ndarray((length,), dtype=np.float64, buffer=shm.buf, offset=length * 8)[:] = series.to_numpy(dtype=np.float64)
+    _published[shm.name] = shm
+    return {"ticker": ticker, "name": shm.name, "length": length}
+
+def attach_series(handle: dict):
+    """
+    Returns a read-only Series backed directly by the shared block (no copy).
+    Attachments are cached, so repeated tasks for the same ticker are free.
+    """
+    name = handle["name"]
+    if name in _attached:
+        return _attached[name][1]
+
+    length = handle["length"]
+    # In-process (single worker) runs attach to the block they published
+    # Spawned workers share the publisher's resource tracker, so attaching
+    # does not hand ownership (or the unlink) to the worker.
+    shm = _published[name] if name in _published else shared_memory.SharedMemory(name=name)
+    timestamps = np.ndarray((length,), dtype=np.int64, buffer=shm.buf)
+    closes = np.ndarray((length,), dtype=np.float64, buffer=shm.buf, offset=length * 8)
+    timestamps.flags.writeable = False
+    closes.flags.writeable = False
+
+    series = pd.Series(closes, index=pd.DatetimeIndex(timestamps.view("datetime64[ns]")), name=handle["ticker"], copy=False)
+    _attached[name] = (shm, series)
+    return series
+
+def _close(shm):
+    try:
+        shm.close()
+    except BufferError:
+        # A caller still holds a view; the mapping goes away with the process
+        pass
+
+def detach_all():
+    attached = list(_attached.items())
+    _attached.clear()
+    for name, (shm, _) in attached:
+        if name not in _published:
+            _close(shm)
+
+def release_all():
+    """Called by the publisher once the run is finished."""
+    detach_all()
+    for shm in _published.values():
+        _close(shm)
+        shm.unlink()
+    _published.clear()
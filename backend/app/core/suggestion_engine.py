@@ -1,6 +1,10 @@
-from . import forecasting
-import yfinance as yf
+from . import forecasting, baselines, job_queue, shared_prices
+from .universe import load_ticker_universe
+from .market_client import market_client
+import os
 import time
+import threading
+from datetime import date
 from sqlalchemy.orm import Session
 from .. import crud
 
@@ -11,57 +15,138 @@ suggestions_cache = {
 }
 CACHE_DURATION_SECONDS = 4 * 60 * 60  # Cache for 4 hours
 
-TICKER_UNIVERSE = ['AAPL', 'MSFT', 'GOOGL', 'NVDA', 'TSLA', 'AMZN', 'META']
+# Only one request regenerates expired suggestions; the rest wait and reuse them
+_suggestions_lock = threading.Lock()
 
-def generate_suggestions(db: Session, horizon: int = 5):
-    current_time = time.time()
+def _suggestions_are_fresh():
+    return time.time() - suggestions_cache["timestamp"] < CACHE_DURATION_SECONDS and suggestions_cache["data"]
 
-    # Check if the cache is still valid
-    if current_time - suggestions_cache["timestamp"] < CACHE_DURATION_SECONDS and suggestions_cache["data"]:
-        print("--- Serving suggestions from cache ---")
-        return suggestions_cache["data"]
+TICKER_UNIVERSE = load_ticker_universe()
 
-    print("--- Cache expired or empty. Generating new suggestions... ---")
-    suggestions = []
+# Number of worker processes draining the suggestion job queue (1 = in-process)
+SUGGESTION_WORKERS = int(os.getenv("SUGGESTION_WORKERS", "1"))
+
+# Two-stage pipeline: cheap baselines screen the whole universe, then only
+# the top SCREEN_TOP_K candidates go through the full model stack.
+SCREEN_TOP_K = int(os.getenv("SUGGESTION_SCREEN_TOP_K", "5"))
+# Same window as real-time training, so the screening download can be
+# shared with the forecasting workers instead of re-downloaded per ticker
+SCREEN_HISTORY_PERIOD = "3y"
 
-    # ... (The loop to generate suggestions remains exactly the same) ...
-    for ticker in TICKER_UNIVERSE:
+def download_universe_prices(tickers):
+    """Downloads the close history for the whole universe in one call (dates x tickers)."""
+    data = market_client.download(tickers, period=SCREEN_HISTORY_PERIOD, interval="1d")
+    if data.empty:
+        return None
+    return data['Close'].reindex(columns=tickers)
+
+def screen_candidates(tickers, close_prices, horizon: int, top_k: int = SCREEN_TOP_K):
+    """
+    Ranks the universe with the vectorized baseline models and returns the
+    top_k candidates.
+    """
+    if close_prices is None:
+        return []
+    price_matrix = close_prices.to_numpy(dtype=float).T
+    return baselines.screen_universe(tickers, price_matrix, horizon, top_k)
+
+def score_ticker(ticker: str, payload: dict):
+    """
+    Job handler for one ticker: runs the full model stack and returns the
+    unranked suggestion dict (or None if the ticker can't be scored).
+    Runs inside queue worker processes, so the result must be JSON-safe.
+    """
+    horizon = payload["horizon"]
+    current_price = payload.get("current_price")
+
+    series = None
+    if payload.get("prices"):
         try:
-            stock_data = yf.Ticker(ticker)
-            current_price = stock_data.history(period="1d")['Close'].iloc[-1]
-            if current_price is None: continue
-
-            forecast_data = forecasting.run_all_forecasts(ticker, horizon)
-            if "error" in forecast_data: continue
-
-            predicted_price = forecast_data["results"]["lstm"]["last_pred"]
-            if predicted_price is None: continue
-
-            growth_percent = ((predicted_price - current_price) / current_price) * 100
-
-            suggestions.append({
-                "ticker": ticker,
-                "current_price": current_price,
-                "forecast_details": {
-                    "predicted_price": predicted_price,
-                    "horizon_days": horizon,
-                    "best_model": forecast_data.get("best_model", "N/A"),
-                },
-                "suggestion_metrics": {
-                    "predicted_growth_percent": growth_percent,
-                    "suggestion_score": growth_percent
-                }
-            })
-        except Exception as e:
-            print(f"Could not analyze {ticker}: {e}")
-            continue
-
-    suggestions.sort(key=lambda x: x['suggestion_metrics']['suggestion_score'], reverse=True)
+            series = shared_prices.attach_series(payload["prices"])
+        except FileNotFoundError:
+            # Stale handle from a crashed run; fall back to downloading
+            series = None
+    if current_price is None:
+        current_price = market_client.history(ticker, period="1d")['Close'].iloc[-1]
+    if current_price is None: return None
+
+    forecast_data = forecasting.run_all_forecasts(ticker, horizon, series=series)
+    if "error" in forecast_data: return None
+
+    # Real-time forecasts may only contain the champion model
+    best_model = forecast_data.get("best_model") or "lstm"
+    predicted_price = forecast_data["results"].get(best_model, {}).get("last_pred")
+    if predicted_price is None: return None
+
+    growth_percent = ((predicted_price - current_price) / current_price) * 100
 
+    return {
+        "ticker": ticker,
+        "current_price": float(current_price),
+        "forecast_details": {
+            "predicted_price": float(predicted_price),
+            "horizon_days": horizon,
+            "best_model": forecast_data.get("best_model") or "N/A",
+        },
+        "suggestion_metrics": {
+            "predicted_growth_percent": float(growth_percent),
+            "suggestion_score": float(growth_percent)
+        }
+    }
+
+def merge_suggestions(suggestions, top_n: int = 3):
+    """Final merge step: ranks the per-ticker job results and keeps the top_n."""
+    suggestions = sorted(suggestions, key=lambda x: x['suggestion_metrics']['suggestion_score'], reverse=True)
     ranked_suggestions = []
-    for i, suggestion in enumerate(suggestions[:3]):
+    for i, suggestion in enumerate(suggestions[:top_n]):
         suggestion['rank'] = i + 1
         ranked_suggestions.append(suggestion)
+    return ranked_suggestions
+
+def run_suggestion_jobs(tickers, horizon: int, top_k: int = SCREEN_TOP_K, workers: int = SUGGESTION_WORKERS):
+    """
+    Screens the universe, then scores the candidates as per-ticker jobs on
+    the local queue. Each call is a new generation of the day's run for
+    this horizon; only a generation whose coordinator crashed is resumed,
+    and then just the jobs that hadn't finished are processed.
+    """
+    close_prices = None
+    try:
+        close_prices = download_universe_prices(tickers)
+        candidates = screen_candidates(tickers, close_prices, horizon, top_k)
+    except Exception as e:
+        print(f"Baseline screening failed, falling back to the first {top_k} tickers: {e}")
+        candidates = [{"ticker": ticker, "current_price": None} for ticker in tickers[:top_k]]
+    print(f"--- Running full models on {len(candidates)} of {len(tickers)} tickers with {workers} worker(s) ---")
+
+    run_name = f"{date.today().isoformat()}-h{horizon}"
+    try:
+        jobs = []
+        for candidate in candidates:
+            payload = {"horizon": horizon, "current_price": candidate["current_price"]}
+            if close_prices is not None:
+                # Workers attach to this by name instead of receiving a pickled Series
+                payload["prices"] = shared_prices.publish_series(candidate["ticker"], close_prices[candidate["ticker"]])
+            jobs.append((candidate["ticker"], payload))
+        return job_queue.process_run(run_name, jobs, score_ticker, workers=workers)
+    finally:
+        shared_prices.release_all()
+
+def generate_suggestions(db: Session, horizon: int = 5):
+    # Check if the cache is still valid
+    if _suggestions_are_fresh():
+        print("--- Serving suggestions from cache ---")
+        return suggestions_cache["data"]
+
+    with _suggestions_lock:
+        if _suggestions_are_fresh():
+            return suggestions_cache["data"]
+        return _regenerate_suggestions(db, horizon)
+
+def _regenerate_suggestions(db: Session, horizon: int):
+    current_time = time.time()
+    print("--- Cache expired or empty. Generating new suggestions... ---")
+    ranked_suggestions = merge_suggestions(run_suggestion_jobs(TICKER_UNIVERSE, horizon))
 
     # --- CORRECTED LOGIC ---
     # 1. Save the newly generated suggestions to the database
@@ -73,4 +158,4 @@ def generate_suggestions(db: Session, horizon: int = 5):
     suggestions_cache["timestamp"] = current_time
     suggestions_cache["data"] = ranked_suggestions
 
-    return ranked_suggestions
\ No newline at end of file
+    return ranked_suggestions
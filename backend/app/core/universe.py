@@ -0,0 +1,29 @@
+import os
+
+# Used when no universe file is configured
+DEFAULT_TICKER_UNIVERSE = ['AAPL', 'MSFT', 'GOOGL', 'NVDA', 'TSLA', 'AMZN', 'META']
+
+def load_ticker_universe(path: str = None):
+    """
+    Loads the ticker universe from a text or CSV file (one ticker per line,
+    first column used for CSV). The path defaults to the TICKER_UNIVERSE_FILE
+    env var. Falls back to DEFAULT_TICKER_UNIVERSE if no file is configured.
+    """
+    path = path or os.getenv("TICKER_UNIVERSE_FILE")
+    if not path:
+        return list(DEFAULT_TICKER_UNIVERSE)
+    if not os.path.exists(path):
+        print(f"Ticker universe file {path} not found, using the default universe.")
+        return list(DEFAULT_TICKER_UNIVERSE)
+
+    tickers, seen = [], set()
+    with open(path, "r") as f:
+        for line in f:
+            ticker = line.split(",")[0].strip().upper()
+            # Skip blanks, comments and a CSV header row
+            if not ticker or ticker.startswith("#") or ticker in ("SYMBOL", "TICKER"):
+                continue
+            if ticker not in seen:
+                seen.add(ticker)
+                tickers.append(ticker)
+    return tickers
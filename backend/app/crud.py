@@ -1,6 +1,9 @@
 from sqlalchemy.orm import Session
 from . import models, schemas, security
-from datetime import date
+import json
+from datetime import date, datetime
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 
 # === User CRUD Functions ===
 
@@ -83,4 +86,101 @@ def create_suggestion_history(db: Session, suggestion: dict):
         db.commit()
 
 def get_suggestion_history(db: Session):
-    return db.query(models.SuggestionHistory).order_by(models.SuggestionHistory.date_suggested.desc()).all()
\ No newline at end of file
+    return db.query(models.SuggestionHistory).order_by(models.SuggestionHistory.date_suggested.desc()).all()
+
+def get_suggestion_history_version(db: Session):
+    """(row count, newest id): changes whenever history rows are added or removed."""
+    count, newest_id = db.query(func.count(models.SuggestionHistory.id), func.max(models.SuggestionHistory.id)).one()
+    return count, newest_id
+
+def get_suggestion_history_tickers(db: Session):
+    return [ticker for (ticker,) in db.query(models.SuggestionHistory.ticker).distinct()]
+
+def iter_suggestion_history_chunks(db: Session, chunk_size: int = 5000):
+    """Yields lists of history rows, streamed from a server-side cursor."""
+    query = db.query(
+        models.SuggestionHistory.date_suggested,
+        models.SuggestionHistory.ticker,
+        models.SuggestionHistory.price_at_suggestion,
+        models.SuggestionHistory.predicted_price,
+        models.SuggestionHistory.best_model,
+    ).order_by(models.SuggestionHistory.date_suggested.desc(), models.SuggestionHistory.id).yield_per(chunk_size)
+
+    chunk = []
+    for row in query:
+        chunk.append(tuple(row))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# === News Headline CRUD Functions ===
+
+def add_headlines(db: Session, ticker: str, headlines: list):
+    """Stores the headlines whose title isn't stored for the ticker yet. Returns how many were added."""
+    existing = {
+        title for (title,) in db.query(models.NewsHeadline.title).filter(
+            models.NewsHeadline.ticker == ticker,
+            models.NewsHeadline.title.in_([h["title"] for h in headlines])
+        )
+    }
+    added = 0
+    for headline in headlines:
+        if headline["title"] in existing:
+            continue
+        existing.add(headline["title"])
+        db.add(models.NewsHeadline(ticker=ticker, **headline))
+        added += 1
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent fetch stored some of the same titles first
+        db.rollback()
+        return add_headlines(db, ticker, headlines)
+    return added
+
+def get_recent_headlines(db: Session, ticker: str, limit: int = 8):
+    return db.query(models.NewsHeadline).filter(
+        models.NewsHeadline.ticker == ticker
+    ).order_by(models.NewsHeadline.published_at.desc()).limit(limit).all()
+
+def update_headline_sentiments(db: Session, sentiments: dict):
+    """sentiments maps headline id -> label."""
+    for headline in db.query(models.NewsHeadline).filter(models.NewsHeadline.id.in_(list(sentiments))):
+        headline.sentiment = sentiments[headline.id]
+    db.commit()
+
+
+# === Model Champion CRUD Functions ===
+
+def get_model_champion(db: Session, ticker: str):
+    return db.query(models.ModelChampion).filter(models.ModelChampion.ticker == ticker).first()
+
+def get_stale_model_champions(db: Session, evaluated_before: datetime):
+    return db.query(models.ModelChampion).filter(models.ModelChampion.last_evaluated < evaluated_before).all()
+
+def record_model_evaluation(db: Session, ticker: str, winner: str, rmse_by_model: dict, promotion_wins: int = 1):
+    """
+    Stores the outcome of a full evaluation. A challenger replaces the
+    champion once it has won `promotion_wins` evaluations in a row.
+    """
+    record = get_model_champion(db, ticker)
+    if record is None:
+        record = models.ModelChampion(ticker=ticker, champion=winner, challenger_wins=0)
+    elif winner == record.champion:
+        record.challenger, record.challenger_wins = None, 0
+    else:
+        if winner == record.challenger:
+            record.challenger_wins += 1
+        else:
+            record.challenger, record.challenger_wins = winner, 1
+        if record.challenger_wins >= promotion_wins:
+            print(f"--- Promoting {winner} to champion for {ticker} (was {record.champion}) ---")
+            record.champion, record.challenger, record.challenger_wins = winner, None, 0
+
+    record.last_rmse = json.dumps(rmse_by_model)
+    record.last_evaluated = datetime.utcnow()
+    db.add(record)
+    db.commit()
+    return record
@@ -0,0 +1,79 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+import orjson
+from fastapi import Request, Response
+
+# --- HTTP Caching Helpers ---
+# Responses carry an ETag and Last-Modified, and conditional GETs get a
+# 304 with no body. When the caller knows the data version up front, the
+# ETag comes from that version and a 304 skips building the payload
+# entirely. Otherwise the ETag is a hash of the orjson-encoded body.
+# Without a timestamp of its own, a version's Last-Modified is when this
+# process first served it.
+
+# Freshness per endpoint, in seconds
+FORECAST_MAX_AGE = 300
+MARKET_OVERVIEW_MAX_AGE = 60
+SUGGESTIONS_MAX_AGE = 3600
+REPORTS_MAX_AGE = 300
+
+VERSIONS_SEEN_MAX_ENTRIES = 4096
+_versions_seen = OrderedDict()
+_versions_seen_lock = threading.Lock()
+
+def _etag(data: bytes):
+    return '"' + hashlib.blake2b(data, digest_size=16).hexdigest() + '"'
+
+def _first_seen(data_version):
+    key = repr(data_version)
+    with _versions_seen_lock:
+        seen_at = _versions_seen.setdefault(key, time.time())
+        _versions_seen.move_to_end(key)
+        while len(_versions_seen) > VERSIONS_SEEN_MAX_ENTRIES:
+            _versions_seen.popitem(last=False)
+    return seen_at
+
+def _not_modified(request: Request, etag: str, last_modified: float):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return etag in candidates or "*" in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def cached_json_response(request: Request, payload, max_age: int, last_modified: float = None, data_version=None):
+    """
+    payload may be a callable, in which case it is only built when the
+    client's cached copy is stale (requires data_version).
+    """
+    if last_modified is None:
+        last_modified = time.time() if data_version is None else _first_seen(data_version)
+    headers = {
+        "Cache-Control": f"private, max-age={max_age}",
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        "Vary": "Authorization",
+    }
+
+    body = None
+    if data_version is not None:
+        etag = _etag(repr(data_version).encode())
+    else:
+        body = orjson.dumps(payload() if callable(payload) else payload, option=orjson.OPT_SERIALIZE_NUMPY)
+        etag = _etag(body)
+    headers["ETag"] = etag
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    if body is None:
+        body = orjson.dumps(payload() if callable(payload) else payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return Response(content=body, media_type="application/json", headers=headers)
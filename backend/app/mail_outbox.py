@@ -0,0 +1,239 @@
+import os
+import ssl
+import time
+import random
+import sqlite3
+import smtplib
+import threading
+from email.message import EmailMessage
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Durable Outbox + Background Mail Dispatcher ---
+# Request handlers only insert a row into a local SQLite outbox and return.
+# A background thread sends due messages in batches over one reused SMTP
+# connection, and retries failures with exponential backoff. Messages
+# survive restarts because they are on disk until sent.
+# A batch is claimed atomically (status 'sending' under a lease), so several
+# processes can share one outbox without sending a message twice; a claim
+# whose process died is picked up again once its lease expires.
+
+MAIL_SERVER = os.getenv("MAIL_SERVER")
+MAIL_PORT = int(os.getenv("MAIL_PORT", "587"))
+MAIL_USERNAME = os.getenv("MAIL_USERNAME")
+MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
+MAIL_FROM = os.getenv("MAIL_FROM")
+MAIL_STARTTLS = os.getenv("MAIL_STARTTLS", "True").lower() == 'true'
+MAIL_SSL_TLS = os.getenv("MAIL_SSL_TLS", "False").lower() == 'true'
+
+MAIL_OUTBOX_PATH = os.getenv("MAIL_OUTBOX_PATH", "mail_outbox.db")
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "20"))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "6"))
+MAIL_TIMEOUT_SECONDS = 30
+MAIL_IDLE_DISCONNECT_SECONDS = 60   # Close the SMTP connection after this long without mail
+RETRY_BASE_SECONDS = 5.0
+MAIL_LEASE_SECONDS = 15 * 60        # A "sending" message older than this is considered abandoned
+DISPATCHER_ERROR_PAUSE_SECONDS = 5.0
+
+def _connect(path: str = MAIL_OUTBOX_PATH):
+    return sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+
+def init_outbox(path: str = MAIL_OUTBOX_PATH):
+    """Creates (or upgrades) the outbox schema. Run once per process, not per message."""
+    conn = _connect(path)
+    try:
+        _create_schema(conn)
+    finally:
+        conn.close()
+
+def _create_schema(conn):
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipient TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            html TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            leased_until REAL,
+            created_at REAL NOT NULL
+        )
+    """)
+    # Outboxes created before claims were leased
+    if "leased_until" not in {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}:
+        conn.execute("ALTER TABLE outbox ADD COLUMN leased_until REAL")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_outbox_due ON outbox (status, next_attempt_at)")
+
+class MailDispatcher:
+    def __init__(self, path: str = MAIL_OUTBOX_PATH):
+        self.path = path
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._smtp = None
+        self._last_used = 0.0
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _ensure_schema(self):
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if not self._schema_ready:
+                init_outbox(self.path)
+                self._schema_ready = True
+
+    # --- Producer side (request handlers) ---
+
+    def enqueue(self, recipient: str, subject: str, html: str):
+        self._ensure_schema()
+        conn = _connect(self.path)
+        try:
+            now = time.time()
+            conn.execute(
+                "INSERT INTO outbox (recipient, subject, html, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (recipient, subject, html, now, now)
+            )
+        finally:
+            conn.close()
+        self._wake.set()
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._ensure_schema()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="mail-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._disconnect()
+
+    # --- Consumer side ---
+
+    def _run(self):
+        conn = None
+        while not self._stopping.is_set():
+            try:
+                if conn is None:
+                    conn = _connect(self.path)
+                batch = self._claim_batch(conn)
+                if batch:
+                    self._send_batch(conn, batch)
+                    continue
+
+                if self._smtp is not None and time.time() - self._last_used > MAIL_IDLE_DISCONNECT_SECONDS:
+                    self._disconnect()
+                next_due = conn.execute("""
+                    SELECT MIN(CASE WHEN status = 'pending' THEN next_attempt_at ELSE leased_until END)
+                    FROM outbox WHERE status IN ('pending', 'sending')
+                """).fetchone()[0]
+                wait = MAIL_IDLE_DISCONNECT_SECONDS if next_due is None else max(0.0, next_due - time.time())
+                self._wake.wait(min(wait, MAIL_IDLE_DISCONNECT_SECONDS))
+                self._wake.clear()
+            except Exception as e:
+                # Keep the dispatcher alive; start over with a fresh connection
+                print(f"Mail dispatcher error, retrying in {DISPATCHER_ERROR_PAUSE_SECONDS:.0f}s: {e}")
+                if conn is not None:
+                    conn.close()
+                    conn = None
+                self._disconnect()
+                self._stopping.wait(DISPATCHER_ERROR_PAUSE_SECONDS)
+        if conn is not None:
+            conn.close()
+
+    def _claim_batch(self, conn):
+        """Marks up to MAIL_BATCH_SIZE due messages as 'sending' under a lease and returns them."""
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Claims that ran out of attempts while their process was gone
+            conn.execute(
+                "UPDATE outbox SET status = 'failed', leased_until = NULL, last_error = 'Lease expired while sending' WHERE status = 'sending' AND leased_until < ? AND attempts >= ?",
+                (now, MAIL_MAX_ATTEMPTS)
+            )
+            batch = conn.execute("""
+                SELECT id, recipient, subject, html, attempts FROM outbox
+                WHERE (status = 'pending' AND next_attempt_at <= ?) OR (status = 'sending' AND leased_until < ?)
+                ORDER BY id LIMIT ?
+            """, (now, now, MAIL_BATCH_SIZE)).fetchall()
+            conn.executemany(
+                "UPDATE outbox SET status = 'sending', attempts = attempts + 1, leased_until = ? WHERE id = ?",
+                [(now + MAIL_LEASE_SECONDS, row[0]) for row in batch]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        # attempts as counted by the claim
+        return [(message_id, recipient, subject, html, attempts + 1) for message_id, recipient, subject, html, attempts in batch]
+
+    def _send_batch(self, conn, batch):
+        for message_id, recipient, subject, html, attempts in batch:
+            try:
+                self._get_smtp().send_message(self._build_message(recipient, subject, html))
+                self._last_used = time.time()
+            except Exception as e:
+                # Drop the connection; it is re-established for the next message
+                self._disconnect()
+                self._record_failure(conn, message_id, attempts, e)
+                continue
+            conn.execute("UPDATE outbox SET status = 'sent', leased_until = NULL, last_error = NULL WHERE id = ?", (message_id,))
+
+    def _record_failure(self, conn, message_id: int, attempts: int, error: Exception):
+        if attempts >= MAIL_MAX_ATTEMPTS:
+            print(f"Giving up on outbox message {message_id} after {attempts} attempts: {error}")
+            conn.execute("UPDATE outbox SET status = 'failed', leased_until = NULL, last_error = ? WHERE id = ?", (str(error), message_id))
+            return
+        delay = RETRY_BASE_SECONDS * (2 ** (attempts - 1)) * random.uniform(0.5, 1.5)
+        print(f"Could not send outbox message {message_id} (attempt {attempts}), retrying in {delay:.0f}s: {error}")
+        conn.execute(
+            "UPDATE outbox SET status = 'pending', leased_until = NULL, last_error = ?, next_attempt_at = ? WHERE id = ?",
+            (str(error), time.time() + delay, message_id)
+        )
+
+    def _build_message(self, recipient: str, subject: str, html: str):
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = MAIL_FROM
+        message["To"] = recipient
+        message.set_content("This message requires an HTML-capable email client.")
+        message.add_alternative(html, subtype="html")
+        return message
+
+    def _get_smtp(self):
+        if self._smtp is not None:
+            return self._smtp
+        context = ssl.create_default_context()
+        if MAIL_SSL_TLS:
+            smtp = smtplib.SMTP_SSL(MAIL_SERVER, MAIL_PORT, timeout=MAIL_TIMEOUT_SECONDS, context=context)
+        else:
+            smtp = smtplib.SMTP(MAIL_SERVER, MAIL_PORT, timeout=MAIL_TIMEOUT_SECONDS)
+            if MAIL_STARTTLS:
+                smtp.starttls(context=context)
+        if MAIL_USERNAME and MAIL_PASSWORD:
+            smtp.login(MAIL_USERNAME, MAIL_PASSWORD)
+        self._smtp = smtp
+        return smtp
+
+    def _disconnect(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass
+        self._smtp = None
+
+# Shared instance, started and stopped with the app
+mail_dispatcher = MailDispatcher()
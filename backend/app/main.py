@@ -1,9 +1,13 @@
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from .database import engine, Base
+from .mail_outbox import mail_dispatcher
 from .api.v1.endpoints import router as api_v1_router
+from .core import news_fetcher, intraday
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="Foresight AI")
+app = FastAPI(title="Foresight AI", default_response_class=ORJSONResponse)
 
 # Add CORS middleware
 origins = [
@@ -16,14 +20,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified"],
 )
 
+# Compress large payloads (forecast predictions, reports)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Run table creation once at startup
 @app.on_event("startup")
 def startup_event():
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
 
+@app.on_event("startup")
+async def start_intraday_stream():
+    intraday.start_stream()
+
+@app.on_event("startup")
+def start_mail_dispatcher():
+    mail_dispatcher.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await intraday.stop_stream()
+    await news_fetcher.close_client()
+    mail_dispatcher.stop()
+
 # Include the API router
 app.include_router(api_v1_router, prefix="/api/v1")
 
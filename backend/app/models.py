@@ -7,7 +7,7 @@ from .database import Base
 
 from sqlalchemy import Column, Integer, String
 from .database import Base
-from sqlalchemy import Column, Integer, String, Float, Date
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, UniqueConstraint
 from .database import Base
 
 class User(Base):
@@ -38,4 +38,26 @@ class WatchlistItem(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
 
     # This creates the link back to the User who owns the item
-    owner = relationship("User", back_populates="watchlist_items")
\ No newline at end of file
+    owner = relationship("User", back_populates="watchlist_items")
+class NewsHeadline(Base):
+    __tablename__ = "news_headlines"
+    __table_args__ = (UniqueConstraint("ticker", "title"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    ticker = Column(String, index=True)
+    title = Column(String, nullable=False)
+    link = Column(String, nullable=True)
+    source = Column(String)
+    published_at = Column(DateTime, index=True)
+    sentiment = Column(String, nullable=True)  # Filled in once FinBERT has scored it
+
+class ModelChampion(Base):
+    __tablename__ = "model_champions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ticker = Column(String, unique=True, index=True, nullable=False)
+    champion = Column(String, nullable=False)
+    challenger = Column(String, nullable=True)     # Model that beat the champion most recently
+    challenger_wins = Column(Integer, default=0)   # Consecutive evaluations it has won
+    last_rmse = Column(String, nullable=True)      # JSON {model_name: rmse} from the last full evaluation
+    last_evaluated = Column(DateTime)
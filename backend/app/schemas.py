@@ -34,12 +34,25 @@ class PasswordResetSchema(BaseModel):
 
 
 # --- Stock Schemas ---
+class HorizonResult(BaseModel):
+    horizon: int
+    last_pred: Optional[float] = None
+    rmse: Optional[float] = None
+    predictions: Optional[List[float]] = None
+
 class ModelResult(BaseModel):
     status: str = "success"
     rmse: Optional[float] = None
     last_pred: Optional[float] = None
     error_message: Optional[str] = None
     predictions: Optional[List[float]] = None
+    horizons: Optional[List[HorizonResult]] = None
+
+class HorizonForecast(BaseModel):
+    horizon: int
+    best_model: Optional[str] = None
+    last_pred: Optional[float] = None
+    rmse: Optional[float] = None
 
 class ForecastResponse(BaseModel):
     ticker: str
@@ -47,6 +60,8 @@ class ForecastResponse(BaseModel):
     results: Dict[str, ModelResult]
     best_model: Optional[str] = None
     current_price: Optional[float] = None
+    dropped_models: List[str] = []
+    horizons: Optional[List[HorizonForecast]] = None
 
 class SuggestionMetrics(BaseModel):
     predicted_growth_percent: float
@@ -7,11 +7,11 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
-from fastapi_mail import ConnectionConfig, FastMail, MessageSchema, MessageType
 from pydantic import EmailStr
 
 from . import crud, models, schemas
 from .database import get_db
+from .mail_outbox import mail_dispatcher
 
 load_dotenv()
 
@@ -57,20 +57,8 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     if user is None:
         raise credentials_exception
     return user
-conf = ConnectionConfig(
-    MAIL_USERNAME = os.getenv("MAIL_USERNAME"),
-    MAIL_PASSWORD = os.getenv("MAIL_PASSWORD"),
-    MAIL_FROM = os.getenv("MAIL_FROM"),
-    MAIL_PORT = int(os.getenv("MAIL_PORT")),
-    MAIL_SERVER = os.getenv("MAIL_SERVER"),
-    MAIL_STARTTLS = os.getenv("MAIL_STARTTLS").lower() == 'true',
-    MAIL_SSL_TLS = os.getenv("MAIL_SSL_TLS").lower() == 'true',
-    USE_CREDENTIALS = True,
-    VALIDATE_CERTS = True
-)
-
-async def send_password_reset_email(email: EmailStr, token: str):
-    """Sends an email with the password reset token."""
+def send_password_reset_email(email: EmailStr, token: str):
+    """Queues an email with the password reset token; the mail dispatcher sends it in the background."""
     reset_link = f"http://localhost:3000/reset-password?token={token}" # Link to your frontend page
 
     html_content = f"""
@@ -80,12 +68,4 @@ async def send_password_reset_email(email: EmailStr, token: str):
     <p>If you did not request this, please ignore this email.</p>
     """
 
-    message = MessageSchema(
-        subject="Foresight AI - Password Reset Request",
-        recipients=[email],
-        body=html_content,
-        subtype=MessageType.html
-    )
-
-    fm = FastMail(conf)
-    await fm.send_message(message)
\ No newline at end of file
+    mail_dispatcher.enqueue(email, "Foresight AI - Password Reset Request", html_content)
@@ -0,0 +1,29 @@
+import argparse
+import sys
+
+from app.core import sentiment_analysis
+
+# Compares the quantized FinBERT against the full-precision model on
+# sentiment_analysis.PARITY_HEADLINES before enabling SENTIMENT_QUANTIZE.
+
+def main():
+    parser = argparse.ArgumentParser(description="Check int8 FinBERT parity against full precision.")
+    parser.add_argument("--threads", type=int, default=sentiment_analysis.SENTIMENT_NUM_THREADS)
+    parser.add_argument("--min-agreement", type=float, default=0.9)
+    args = parser.parse_args()
+
+    report = sentiment_analysis.check_quantization_parity(num_threads=args.threads)
+
+    print(f"Label agreement: {report['agreement']:.1%} on {report['headline_count']} headlines")
+    for mode in ("full_precision", "quantized"):
+        stats = report[mode]
+        print(f"{mode}: {stats['size_mb']:.1f} MB, {stats['latency_ms_per_headline']:.1f} ms/headline")
+    for title, full_label, quantized_label in report["disagreements"]:
+        print(f"  mismatch: {full_label} -> {quantized_label}: {title}")
+
+    if report["agreement"] < args.min_agreement:
+        sys.exit(1)
+
+# Main execution block
+if __name__ == "__main__":
+    main()
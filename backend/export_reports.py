@@ -0,0 +1,31 @@
+import argparse
+
+from app.database import SessionLocal
+from app.core import reports_export
+
+# Exports the full suggestion history with performance against the latest
+# prices, streaming chunk by chunk so it runs in constant memory.
+
+def main():
+    parser = argparse.ArgumentParser(description="Export suggestion history and performance.")
+    parser.add_argument("output", help="Output file path")
+    parser.add_argument("--format", choices=sorted(reports_export.EXPORT_FORMATS), default="csv")
+    parser.add_argument("--chunk-size", type=int, default=reports_export.EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be positive")
+
+    iter_export, _ = reports_export.EXPORT_FORMATS[args.format]
+    db = SessionLocal()
+    try:
+        mode = "w" if args.format == "csv" else "wb"
+        with open(args.output, mode) as f:
+            for data in iter_export(db, args.chunk_size):
+                f.write(data)
+    finally:
+        db.close()
+    print(f"Exported suggestion history to {args.output}")
+
+# Main execution block
+if __name__ == "__main__":
+    main()
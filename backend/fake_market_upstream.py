@@ -0,0 +1,195 @@
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from yfinance.data import YfData
+from yfinance.exceptions import YFRateLimitError
+
+from app.core import market_client as mc
+
+# Local fake of Yahoo's chart API for exercising the market-data client.
+# It replaces yfinance's HTTP layer (YfData.get), so the real yfinance
+# download/history code runs on top of it and fails the way it does in
+# production: a 429 raises YFRateLimitError inside yfinance, which
+# yf.download swallows and turns into an empty frame. Latency, the share of
+# throttled requests, outages, unknown tickers and tickers that are always
+# throttled are configurable.
+#
+#   python fake_market_upstream.py --check
+
+YAHOO_CHART_URL = "https://query2.finance.yahoo.com/v8/finance/chart/"
+
+class FakeResponse:
+    def __init__(self, status_code: int, payload: dict):
+        self.status_code = status_code
+        self.url = YAHOO_CHART_URL
+        self.text = json.dumps(payload)
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+class FakeYahooUpstream:
+    def __init__(self, latency_seconds: float = 0.0, rate_limit_ratio: float = 0.0, unknown_tickers=(), seed: int = 0):
+        self.latency_seconds = latency_seconds
+        self.rate_limit_ratio = rate_limit_ratio
+        self.unknown_tickers = set(unknown_tickers)
+        self.down = False           # Every request fails with a connection error
+        self.throttle_next = 0      # The next N requests get a 429
+        self.throttled_tickers = set()  # Requests for these always get a 429
+        self.requests = 0
+        self.requested_tickers = []
+        self.throttled = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._original_get = None
+
+    # --- Patching ---
+
+    def install(self):
+        yf.set_tz_cache_location(tempfile.mkdtemp(prefix="fake-yahoo-tz-"))
+        self._original_get = YfData.get
+        upstream = self
+
+        def get(data, url, params=None, timeout=30):
+            return upstream.handle(url, params or {})
+        YfData.get = get
+        return self
+
+    def uninstall(self):
+        if self._original_get is not None:
+            YfData.get = self._original_get
+            self._original_get = None
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc):
+        self.uninstall()
+
+    # --- Requests ---
+
+    def handle(self, url: str, params: dict):
+        time.sleep(self.latency_seconds)
+        ticker = url.rsplit("/", 1)[-1]
+        with self._lock:
+            self.requests += 1
+            self.requested_tickers.append(ticker)
+            throttle = self.throttle_next > 0 or ticker in self.throttled_tickers or self._rng.random() < self.rate_limit_ratio
+            if self.throttle_next > 0:
+                self.throttle_next -= 1
+            if throttle:
+                self.throttled += 1
+        if self.down:
+            raise ConnectionError("Fake upstream is down")
+        if throttle:
+            # What yfinance's request layer raises when Yahoo answers 429
+            raise YFRateLimitError()
+
+        if ticker in self.unknown_tickers:
+            return FakeResponse(404, {"chart": {"result": None, "error": {"code": "Not Found", "description": "No data found, symbol may be delisted"}}})
+        return FakeResponse(200, _chart_payload(ticker, params))
+
+def _chart_payload(ticker: str, params: dict):
+    days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=30)
+    timestamps = [int(day.timestamp()) + 14 * 3600 + 1800 for day in days]  # 09:30 New York as UTC epoch
+    rng = np.random.default_rng(abs(hash(ticker)) % (2 ** 32))
+    closes = (100 + np.cumsum(rng.normal(0, 1, len(days)))).round(2).tolist()
+    meta = {
+        "currency": "USD", "symbol": ticker, "exchangeName": "NMS", "instrumentType": "EQUITY",
+        "exchangeTimezoneName": "America/New_York", "timezone": "EDT", "gmtoffset": -14400,
+        "priceHint": 2, "regularMarketPrice": closes[-1], "dataGranularity": "1d",
+        "range": params.get("range", ""), "firstTradeDate": 946684800,
+        "validRanges": ["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"],
+    }
+    quote = {"open": closes, "high": closes, "low": closes, "close": closes, "volume": [1_000_000] * len(closes)}
+    return {"chart": {"result": [{"meta": meta, "timestamp": timestamps, "indicators": {"quote": [quote], "adjclose": [{"adjclose": closes}]}}], "error": None}}
+
+# --- Scripted check of the client against the fake ---
+
+def run_check():
+    mc.BACKOFF_BASE_SECONDS = 0.01
+    mc.RATE_LIMIT_BACKOFF_SECONDS = 0.05
+    failures = []
+
+    def check(name, ok):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        if not ok:
+            failures.append(name)
+
+    with FakeYahooUpstream(unknown_tickers={"NOSUCH"}) as upstream:
+        client = mc.MarketDataClient(backend=mc.YFinanceBackend(), rate_per_second=1000, burst=1000,
+                                     max_retries=2, breaker_failures=2, breaker_reset_seconds=60)
+
+        data = client.download(["AAPL", "MSFT"], period="5d")
+        check("healthy download returns prices", not data.empty and list(data["Close"].columns) == ["AAPL", "MSFT"])
+
+        upstream.throttle_next = 1
+        data = client.download(["NVDA"], period="5d")
+        check("429 is retried instead of returned as empty", not data.empty and upstream.throttled == 1)
+
+        upstream.throttle_next = 1
+        history = client.history("TSLA", period="5d")
+        check("429 on history is retried", not history.empty)
+
+        data = client.download(["NOSUCH"], period="5d")
+        check("unknown ticker is empty, not a failure", data.empty and client.breaker.state == "closed")
+
+        # Warm yfinance's timezone cache so each download below is one request per ticker
+        client.download(["AMD", "AMZN", "INTC", "META", "ORCL"], period="1mo")
+
+        upstream.requested_tickers = []
+        upstream.throttled_tickers = {"AMZN"}
+        data = client.download(["AMD", "AMZN", "INTC"], period="5d")
+        upstream.throttled_tickers = set()
+        closes, requested = data["Close"], upstream.requested_tickers
+        check("one throttled ticker keeps the others and only it is retried",
+              closes["AMD"].notna().all() and closes["INTC"].notna().all() and closes["AMZN"].isna().all()
+              and requested.count("AMD") == requested.count("INTC") == 1 and requested.count("AMZN") == 3
+              and client.breaker.state == "closed")
+
+        upstream.throttle_next, upstream.requested_tickers = 1, []
+        data = client.download(["META", "ORCL"], period="5d")
+        check("a retried ticker is merged back in",
+              data["Close"][["META", "ORCL"]].notna().all().all() and len(upstream.requested_tickers) == 3)
+
+        paced = mc.MarketDataClient(backend=mc.YFinanceBackend(), rate_per_second=20, burst=2)
+        started = time.monotonic()
+        paced.download(["A", "B", "C", "D", "E", "F"], period="5d")
+        paced.download(["G"], period="5d")
+        check("the rate limit counts one request per ticker", time.monotonic() - started >= 0.2)
+
+        upstream.throttle_next = 100
+        try:
+            client.download(["GOOGL"], period="5d")
+            check("persistent 429 raises", False)
+        except Exception as e:
+            check("persistent 429 raises", mc.is_rate_limited(e))
+
+        data = client.download(["AAPL", "MSFT"], period="5d")
+        check("breaker opens after repeated failures and serves last good data", client.breaker.state == "open" and not data.empty)
+
+    if failures:
+        print(f"\n{len(failures)} check(s) failed.")
+        sys.exit(1)
+    print("\nAll checks passed.")
+
+# Main execution block
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Yahoo upstream for the market-data client.")
+    parser.add_argument("--check", action="store_true", help="Run the client against the fake and verify retries, backoff and the breaker")
+    args = parser.parse_args()
+    if args.check:
+        run_check()
+    else:
+        parser.print_help()
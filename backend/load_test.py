@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+from collections import defaultdict
+
+# Scripted load test for the API. Starts the app locally on a throwaway
+# SQLite database with stubbed market data, forecasting and sentiment
+# backends, runs concurrent virtual users through the main user journeys,
+# reports throughput and p50/p95/p99 latency per route and exits non-zero
+# if any SLO in the thresholds file is broken.
+#
+#   python load_test.py --users 20 --iterations 10 --slo loadtest_slo.json
+
+# Must be set before the app (and its engine) is imported
+_db_dir = tempfile.mkdtemp(prefix="foresight-loadtest-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'loadtest.db')}"
+os.environ.pop("INTRADAY_SOURCE", None)
+
+import numpy as np
+import pandas as pd
+import httpx
+import uvicorn
+
+from app.main import app
+from app.core import forecasting, market_client, news_fetcher, sentiment_analysis
+
+TICKERS = ['AAPL', 'MSFT', 'GOOGL', 'NVDA', 'TSLA', 'AMZN', 'META']
+PASSWORD = "load-test-password"
+
+# --- Stubbed Backends ---
+
+class FakeMarketBackend:
+    """Synthetic yfinance-shaped frames with a little simulated upstream latency."""
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+
+    def _closes(self, ticker: str, periods: int):
+        rng = np.random.default_rng(abs(hash(ticker)) % (2 ** 32))
+        return 100 + np.cumsum(rng.normal(0, 1, periods))
+
+    def download(self, tickers, timeout: float, period: str = "2d", **kwargs):
+        time.sleep(self.latency_seconds)
+        tickers = tickers if isinstance(tickers, (list, tuple)) else [tickers]
+        index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=5)
+        closes = pd.DataFrame({ticker: self._closes(ticker, len(index)) for ticker in tickers}, index=index)
+        closes.columns.name = "Ticker"
+        return pd.concat({"Close": closes}, axis=1, names=["Price"])
+
+    def history(self, ticker: str, timeout: float, **kwargs):
+        time.sleep(self.latency_seconds)
+        index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=2)
+        return pd.DataFrame({"Close": self._closes(ticker, len(index))}, index=index)
+
+def install_stubs(model_latency: float, market_latency: float):
+    market_client.market_client.backend = FakeMarketBackend(market_latency)
+
+    def fake_forecasts(ticker: str, horizon: int, budget_seconds: float = None, series=None, horizons=None):
+        time.sleep(model_latency)
+        predictions = [100.0 + i for i in range(horizon)]
+        result = {"status": "success", "rmse": 1.0, "last_pred": predictions[-1], "predictions": predictions}
+        return {
+            "ticker": ticker, "horizon": horizon, "best_model": "arima", "current_price": 100.0,
+            "results": {name: dict(result) for name in ("arima", "sarima", "prophet", "lstm")},
+        }
+    forecasting.run_all_forecasts = fake_forecasts
+
+    async def fake_headlines(ticker: str):
+        await asyncio.sleep(market_latency)
+        return [{"id": i, "title": f"{ticker} headline {i}", "sentiment": None} for i in range(8)]
+    news_fetcher.fetch_headlines = fake_headlines
+    sentiment_analysis._save_sentiments = lambda sentiments: None
+
+    def fake_classify(titles):
+        time.sleep(model_latency / 10)
+        return ["positive" if i % 2 else "neutral" for i in range(len(titles))]
+    sentiment_analysis.classify_headlines = fake_classify
+
+# --- Local Server ---
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(port: int):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+# --- Scenario ---
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def request(self, client, route: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.latencies[route].append((time.perf_counter() - started) * 1000)
+        if not ok:
+            self.errors[route] += 1
+        return response
+
+async def virtual_user(client, recorder: Recorder, user_id: int, iterations: int, overview_polls: int):
+    email = f"loadtest-user-{user_id}@example.com"
+    await client.post("/api/v1/auth/register", json={"email": email, "password": PASSWORD})
+
+    response = await recorder.request(client, "POST /auth/token", "POST", "/api/v1/auth/token",
+                                      data={"username": email, "password": PASSWORD})
+    if response is None or response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    await client.post(f"/api/v1/watchlist/{TICKERS[user_id % len(TICKERS)]}", headers=headers)
+
+    for i in range(iterations):
+        ticker = TICKERS[(user_id + i) % len(TICKERS)]
+        await recorder.request(client, "GET /watchlist", "GET", "/api/v1/watchlist", headers=headers)
+        for _ in range(overview_polls):
+            await recorder.request(client, "GET /stocks/market-overview", "GET", "/api/v1/stocks/market-overview", headers=headers)
+        await recorder.request(client, "GET /stocks/forecast/{ticker}", "GET", f"/api/v1/stocks/forecast/{ticker}", headers=headers)
+        await recorder.request(client, "GET /stocks/sentiment/{ticker}", "GET", f"/api/v1/stocks/sentiment/{ticker}", headers=headers)
+
+async def run_load(base_url: str, users: int, iterations: int, overview_polls: int):
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_user(client, recorder, u, iterations, overview_polls) for u in range(users)))
+        elapsed = time.perf_counter() - started
+    return recorder, elapsed
+
+# --- Reporting & SLO Gates ---
+
+def percentile(values, p: float):
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+def summarize(recorder: Recorder, elapsed: float):
+    summary = {}
+    for route, latencies in sorted(recorder.latencies.items()):
+        summary[route] = {
+            "count": len(latencies),
+            "error_rate": recorder.errors[route] / len(latencies),
+            "throughput_rps": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+        }
+    return summary
+
+def check_slos(summary: dict, slos: dict):
+    """slos: {"routes": {route: {"p50_ms"|"p95_ms"|"p99_ms"|"max_error_rate"|"min_throughput_rps": limit}}}"""
+    breaches = []
+    for route, limits in slos.get("routes", {}).items():
+        stats = summary.get(route)
+        if stats is None:
+            breaches.append(f"{route}: no requests recorded")
+            continue
+        for metric, limit in limits.items():
+            if metric == "max_error_rate" and stats["error_rate"] > limit:
+                breaches.append(f"{route}: error rate {stats['error_rate']:.2%} > {limit:.2%}")
+            elif metric == "min_throughput_rps" and stats["throughput_rps"] < limit:
+                breaches.append(f"{route}: throughput {stats['throughput_rps']:.1f} rps < {limit}")
+            elif metric.endswith("_ms") and stats[metric] > limit:
+                breaches.append(f"{route}: {metric[:-3]} {stats[metric]:.1f} ms > {limit} ms")
+    return breaches
+
+def print_report(summary: dict, elapsed: float):
+    print(f"\n--- Load test finished in {elapsed:.1f}s ---")
+    print(f"{'route':<32}{'count':>7}{'err%':>7}{'rps':>8}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}")
+    for route, stats in summary.items():
+        print(f"{route:<32}{stats['count']:>7}{stats['error_rate'] * 100:>7.1f}{stats['throughput_rps']:>8.1f}"
+              f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API against stubbed backends.")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=10, help="Scenario loops per user")
+    parser.add_argument("--overview-polls", type=int, default=3, help="Market overview polls per loop")
+    parser.add_argument("--model-latency", type=float, default=0.05, help="Simulated forecast time (s)")
+    parser.add_argument("--market-latency", type=float, default=0.01, help="Simulated upstream latency (s)")
+    parser.add_argument("--slo", default="loadtest_slo.json", help="SLO thresholds file")
+    parser.add_argument("--json", dest="json_output", help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    install_stubs(args.model_latency, args.market_latency)
+    port = _free_port()
+    server, thread = start_server(port)
+    try:
+        recorder, elapsed = asyncio.run(run_load(f"http://127.0.0.1:{port}", args.users, args.iterations, args.overview_polls))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    summary = summarize(recorder, elapsed)
+    print_report(summary, elapsed)
+    if args.json_output:
+        with open(args.json_output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    if args.slo and os.path.exists(args.slo):
+        with open(args.slo) as f:
+            breaches = check_slos(summary, json.load(f))
+        if breaches:
+            print("\nSLO breaches:")
+            for breach in breaches:
+                print(f"  - {breach}")
+            sys.exit(1)
+        print("\nAll SLOs met.")
+
+# Main execution block
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import argparse
+
+from app.database import SessionLocal, engine, Base
+from app import crud
+from app.core import suggestion_engine, model_selection
+from app.core.universe import load_ticker_universe
+
+# Daily batch scoring of the full ticker universe.
+# Each invocation scores a fresh generation; re-running after a crash
+# resumes the interrupted one from the job queue checkpoint.
+
+def main():
+    parser = argparse.ArgumentParser(description="Score the ticker universe and save the top suggestions.")
+    parser.add_argument("--universe-file", help="Ticker file (defaults to TICKER_UNIVERSE_FILE)")
+    parser.add_argument("--horizon", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=suggestion_engine.SUGGESTION_WORKERS)
+    parser.add_argument("--top-k", type=int, default=suggestion_engine.SCREEN_TOP_K,
+                        help="Candidates passed from the baseline screen to the full models")
+    parser.add_argument("--top-n", type=int, default=3, help="Suggestions to keep after the merge step")
+    parser.add_argument("--reevaluate-champions", action="store_true",
+                        help="Also re-run the full model ensemble for tickers with a stale champion")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    if args.reevaluate_champions:
+        model_selection.reevaluate_stale_champions(args.horizon)
+
+    tickers = load_ticker_universe(args.universe_file)
+    results = suggestion_engine.run_suggestion_jobs(tickers, args.horizon, top_k=args.top_k, workers=args.workers)
+    ranked_suggestions = suggestion_engine.merge_suggestions(results, top_n=args.top_n)
+
+    db = SessionLocal()
+    try:
+        for suggestion in ranked_suggestions:
+            crud.create_suggestion_history(db=db, suggestion=suggestion)
+    finally:
+        db.close()
+
+    for suggestion in ranked_suggestions:
+        print(f"{suggestion['rank']}. {suggestion['ticker']}: {suggestion['suggestion_metrics']['predicted_growth_percent']:.2f}%")
+
+# Main execution block
+if __name__ == "__main__":
+    main()
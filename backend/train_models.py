@@ -2,18 +2,18 @@ import yfinance as yf
 from statsmodels.tsa.arima.model import ARIMA
 from prophet import Prophet
 from prophet.serialize import model_to_json
-from sklearn.preprocessing import MinMaxScaler
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense
-import numpy as np
 import pickle
-import joblib
 import warnings
+from app.core.universe import load_ticker_universe
+from app.core.features import SeriesFeatures
+from app.core.artifact_store import artifact_store
 
 warnings.filterwarnings("ignore")
 
 # The list of stocks you want to pre-train models for
-TICKER_UNIVERSE = ['AAPL', 'MSFT', 'GOOGL', 'NVDA', 'TSLA', 'AMZN', 'META']
+TICKER_UNIVERSE = load_ticker_universe()
 
 def train_and_save_models_for_ticker(ticker):
     print(f"--- Training models for {ticker} ---")
@@ -24,33 +24,25 @@ def train_and_save_models_for_ticker(ticker):
             print(f"No data for {ticker}, skipping.")
             return
         series = data['Close']
+        features = SeriesFeatures(series)
+        window = {"train_start": series.index[0], "train_end": series.index[-1]}
 
         # 2. Train and save ARIMA
         print(f"Training ARIMA for {ticker}...")
         arima_model = ARIMA(series, order=(5, 1, 0)).fit()
-        with open(f"{ticker}_arima.pkl", "wb") as f:
-            pickle.dump(arima_model, f)
-        print(f"Saved {ticker}_arima.pkl")
+        entry = artifact_store.publish(ticker, "arima", {"model": artifact_store.put_bytes(pickle.dumps(arima_model))}, **window)
+        print(f"Saved ARIMA for {ticker} (version {entry['version']})")
 
         # 3. Train and save Prophet
         print(f"Training Prophet for {ticker}...")
-        df = series.reset_index(); df.columns = ['ds', 'y']
-        prophet_model = Prophet().fit(df)
-        with open(f"{ticker}_prophet.json", "w") as f:
-            f.write(model_to_json(prophet_model))
-        print(f"Saved {ticker}_prophet.json")
+        prophet_model = Prophet().fit(features.prophet_frame)
+        entry = artifact_store.publish(ticker, "prophet", {"model": artifact_store.put_bytes(model_to_json(prophet_model).encode())}, **window)
+        print(f"Saved Prophet for {ticker} (version {entry['version']})")
 
         # 4. Train and save LSTM
         print(f"Training LSTM for {ticker}...")
-        scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_data = scaler.fit_transform(series.values.reshape(-1, 1))
-
-        look_back = 60
-        X, y = [], []
-        for i in range(look_back, len(scaled_data)):
-            X.append(scaled_data[i-look_back:i, 0]); y.append(scaled_data[i, 0])
-        X, y = np.array(X), np.array(y)
-        X = np.reshape(X, (X.shape[0], X.shape[1], 1))
+        scaler = features.lstm_scaler
+        X, y = features.lstm_windows()
 
         lstm_model = Sequential([
             LSTM(50, return_sequences=True, input_shape=(X.shape[1], 1)),
@@ -59,9 +51,10 @@ def train_and_save_models_for_ticker(ticker):
         lstm_model.compile(optimizer='adam', loss='mean_squared_error')
         lstm_model.fit(X, y, batch_size=1, epochs=10) # More epochs for better training
 
-        lstm_model.save(f"{ticker}_lstm.h5")
-        joblib.dump(scaler, f"{ticker}_scaler.save")
-        print(f"Saved {ticker}_lstm.h5 and {ticker}_scaler.save")
+        parts = artifact_store.put_keras_model(lstm_model)
+        parts["scaler"] = artifact_store.put_bytes(pickle.dumps(scaler))
+        entry = artifact_store.publish(ticker, "lstm", parts, **window)
+        print(f"Saved LSTM and scaler for {ticker} (version {entry['version']})")
 
     except Exception as e:
         print(f"Failed to train models for {ticker}: {e}")